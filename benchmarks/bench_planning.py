@@ -0,0 +1,187 @@
+# benchmarks/bench_planning.py
+"""
+Benchmark the planning hot paths on synthetic scenes.
+
+Times ROI filtering, cone pairing, the quadratic fit and curve rasterization
+as cone count and frame count grow, for every implementation registered in
+IMPLEMENTATIONS. "baseline" is the original per-cone/per-point Python code of
+real-time_trajectory_planner.py, kept here verbatim as the reference point;
+"current" is what the planner runs today (src/planning/track_utils.py), and
+"rls" swaps in the incremental TrajectoryFitter for the fit.
+
+Run from the repository root:
+    python -m benchmarks.bench_planning --output outputs/benchmarks/planning.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic_scenes import FRAME_SHAPE, SCENES, generate_session
+from src.planning import track_utils
+from src.planning.trajectory_fitter import TrajectoryFitter
+
+CONE_COUNTS = (0, 10, 25, 50, 100, 200)
+FRAME_COUNTS = (100, 1000)
+
+
+# === BASELINE (original planner code) ===
+def baseline_inside_roi(x, y, polygon):
+    x = float(x)
+    y = float(y)
+    return cv2.pointPolygonTest(polygon, (x, y), True) >= -3
+
+
+def baseline_new_func(h, w):
+    ROI_POLYGON = np.array([
+        [int(0.05 * w), int(0.98 * h)],
+        [int(0.35 * w), int(0.45 * h)],
+        [int(0.65 * w), int(0.45 * h)],
+        [int(0.95 * w), int(0.98 * h)]
+    ], np.int32)
+    return ROI_POLYGON
+
+
+def baseline_pair_cones(left_cones, right_cones, y_threshold=30):
+    midpoints = []
+    for lx, ly in left_cones:
+        best_match = None
+        min_y_diff = y_threshold
+        for rx, ry in right_cones:
+            if abs(ly - ry) < min_y_diff:
+                best_match = (rx, ry)
+                min_y_diff = abs(ly - ry)
+        if best_match:
+            mx = int((lx + best_match[0]) / 2)
+            my = int((ly + best_match[1]) / 2)
+            midpoints.append((mx, my))
+    return midpoints
+
+
+def baseline_roi(detections, h, w):
+    polygon = baseline_new_func(h, w)
+    left_cones = [(x, y) for cls, x, y in detections if cls == 0 and baseline_inside_roi(x, y, polygon)]
+    right_cones = [(x, y) for cls, x, y in detections if cls == 4 and baseline_inside_roi(x, y, polygon)]
+    return left_cones, right_cones
+
+
+def baseline_fit(midpoints):
+    midpoints = sorted(midpoints, key=lambda pt: pt[1])
+    x_vals = np.array([pt[0] for pt in midpoints])
+    y_vals = np.array([pt[1] for pt in midpoints])
+    return np.polyfit(y_vals, x_vals, deg=2), y_vals
+
+
+def baseline_raster(coeffs, y_vals):
+    y_fit = np.linspace(y_vals[0], y_vals[-1], 100)
+    x_fit = np.polyval(coeffs, y_fit)
+    return np.array([[int(x), int(y)] for x, y in zip(x_fit, y_fit)], dtype=np.int32)
+
+
+# === CURRENT (track_utils) ===
+def current_fit_raster(midpoints):
+    return track_utils.fit_trajectory(midpoints)
+
+
+IMPLEMENTATIONS = {
+    "baseline": {
+        "roi": baseline_roi,
+        "pair": baseline_pair_cones,
+        "fit": baseline_fit,
+        "raster": baseline_raster,
+    },
+    "current": {
+        "roi": track_utils.filter_cones,
+        "pair": track_utils.pair_cones,
+        "fit_raster": current_fit_raster,
+    },
+    "rls": {
+        "roi": track_utils.filter_cones,
+        "pair": track_utils.pair_cones,
+        # Stateful: one fresh fitter per benchmarked session, as the planner uses it
+        "make_fit_raster": lambda: TrajectoryFitter().fit,
+    },
+}
+
+
+def _time_per_frame(fn, args_per_frame):
+    """Mean wall time of fn over all frames, in microseconds per frame."""
+    start = time.perf_counter()
+    for args in args_per_frame:
+        fn(*args)
+    elapsed = time.perf_counter() - start
+    return elapsed / max(len(args_per_frame), 1) * 1e6
+
+
+def bench_case(frames, impl):
+    """Time every stage of one implementation on one synthetic session."""
+    h, w = FRAME_SHAPE
+    ops = IMPLEMENTATIONS[impl]
+    results = {}
+
+    roi_args = [(frame, h, w) for frame in frames]
+    results["roi"] = _time_per_frame(ops["roi"], roi_args)
+    split = [ops["roi"](*args) for args in roi_args]
+
+    results["pair"] = _time_per_frame(ops["pair"], split)
+
+    # Fit inputs come from the baseline pairing so both implementations fit the same points
+    midpoints = [baseline_pair_cones(*[list(map(tuple, side)) for side in pair]) for pair in split]
+    fittable = [(mp,) for mp in midpoints if len(mp) >= 3]
+    if "fit" in ops:
+        results["fit"] = _time_per_frame(ops["fit"], fittable)
+        fitted = [ops["fit"](*args) for args in fittable]
+        results["raster"] = _time_per_frame(ops["raster"], fitted)
+        results["fit_raster"] = results["fit"] + results["raster"]
+    else:
+        fit_raster = ops["make_fit_raster"]() if "make_fit_raster" in ops else ops["fit_raster"]
+        results["fit_raster"] = _time_per_frame(fit_raster, fittable)
+    results["fitted_frames"] = len(fittable)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark planning hot paths on synthetic cone scenes.")
+    parser.add_argument("--scenes", nargs="+", default=list(SCENES), choices=SCENES)
+    parser.add_argument("--cones", nargs="+", type=int, default=list(CONE_COUNTS))
+    parser.add_argument("--frames", nargs="+", type=int, default=list(FRAME_COUNTS))
+    parser.add_argument("--impls", nargs="+", default=list(IMPLEMENTATIONS), choices=list(IMPLEMENTATIONS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="outputs/benchmarks/planning.json")
+    args = parser.parse_args()
+
+    runs = []
+    for scene in args.scenes:
+        for num_frames in args.frames:
+            for num_cones in args.cones:
+                frames = generate_session(scene, num_frames, num_cones, seed=args.seed)
+                mean_cones = float(np.mean([len(f) for f in frames]))
+                for impl in args.impls:
+                    timings = bench_case(frames, impl)
+                    runs.append({"scene": scene, "frames": num_frames, "cones": num_cones,
+                                 "mean_detections": mean_cones, "impl": impl, "us_per_frame": timings})
+                    stages = "  ".join(f"{k}={v:.1f}" for k, v in timings.items() if k != "fitted_frames")
+                    print(f"[{scene:<8} frames={num_frames:<5} cones={num_cones:<4}] {impl:<9} {stages} (µs/frame)")
+
+    result = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": args.seed,
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "runs": runs,
+    }
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"[INFO] ✅ Benchmark results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/synthetic_scenes.py
+"""
+Synthetic cone layouts for benchmarking the planning code without FSOCO or a GPU.
+
+Track boundaries are laid out on the ground plane (x to the right, z forward,
+metres), sampled as blue (left) and yellow (right) cones, and projected into a
+640x480 image with a simple pinhole camera. Each frame slides the cones a
+little along the track and adds pixel noise, missed cones and false positives.
+Frames come out as (N, 3) int arrays of [cls, cx, cy], the same layout
+ConeStore.cones() returns.
+"""
+
+import numpy as np
+
+FRAME_SHAPE = (480, 640)  # h, w
+FOCAL_PX = 500.0
+CAMERA_HEIGHT_M = 1.0
+HORIZON_Y = 0.45 * FRAME_SHAPE[0]  # matches the top of the planner ROI
+
+LEFT_CLASS = 0
+RIGHT_CLASS = 4
+
+SCENES = ("straight", "skidpad", "hairpin")
+TRACK_WIDTH_M = 3.0
+# Arclength window (metres ahead of the car) over which cones are placed
+VISIBLE_RANGE_M = {"straight": (2.5, 30.0), "skidpad": (2.5, 12.0), "hairpin": (2.5, 25.0)}
+
+
+def _centerline(scene, s):
+    """Centerline points (x, z) and unit headings at arclengths s (metres from the car)."""
+    if scene == "straight":
+        x, z = np.zeros_like(s), s
+        heading = np.stack([np.zeros_like(s), np.ones_like(s)], axis=1)
+    elif scene == "skidpad":
+        r = 9.125  # FS skidpad centreline radius
+        theta = s / r
+        x, z = r - r * np.cos(theta), r * np.sin(theta)
+        heading = np.stack([np.sin(theta), np.cos(theta)], axis=1)
+    elif scene == "hairpin":
+        # Straight, 180° right-hand turn, straight back
+        straight_len, r = 12.0, 4.5
+        theta = np.clip((s - straight_len) / r, 0.0, np.pi)
+        back = np.clip(s - straight_len - np.pi * r, 0.0, None)
+        on_turn = (s > straight_len) & (back == 0)
+        x = np.where(back > 0, 2 * r, np.where(on_turn, r - r * np.cos(theta), 0.0))
+        z = np.where(back > 0, straight_len - back, np.where(on_turn, straight_len + r * np.sin(theta), s))
+        heading = np.stack([np.where(on_turn, np.sin(theta), 0.0),
+                            np.where(back > 0, -1.0, np.where(on_turn, np.cos(theta), 1.0))], axis=1)
+    else:
+        raise ValueError(f"Unknown scene {scene!r}, expected one of {SCENES}")
+    return np.stack([x, z], axis=1), heading
+
+
+def _project(points):
+    """Ground-plane (x, z) -> pixel (u, v); points behind or too close to the camera become NaN."""
+    x, z = points[:, 0], points[:, 1]
+    z = np.where(z > 0.5, z, np.nan)
+    u = FRAME_SHAPE[1] / 2 + FOCAL_PX * x / z
+    v = HORIZON_Y + FOCAL_PX * CAMERA_HEIGHT_M / z
+    return np.stack([u, v], axis=1)
+
+
+def generate_frame(scene, num_cones, rng, offset=0.0, pixel_noise=1.5, miss_rate=0.1, false_positive_rate=0.05):
+    """One frame with about num_cones detections, as an (N, 3) int array of [cls, cx, cy]."""
+    per_side = num_cones // 2
+    if per_side == 0:
+        return np.empty((0, 3), dtype=int)
+
+    s = np.linspace(*VISIBLE_RANGE_M[scene], per_side) + offset % 1.0
+    center, heading = _centerline(scene, s)
+    normal = np.stack([-heading[:, 1], heading[:, 0]], axis=1)  # points to the left of travel
+    left = _project(center + normal * TRACK_WIDTH_M / 2)
+    right = _project(center - normal * TRACK_WIDTH_M / 2)
+
+    pixels = np.concatenate([left, right])
+    cls = np.concatenate([np.full(per_side, LEFT_CLASS), np.full(per_side, RIGHT_CLASS)])
+    pixels += rng.normal(0.0, pixel_noise, pixels.shape)
+
+    keep = rng.random(len(pixels)) >= miss_rate
+    num_fp = rng.binomial(num_cones, false_positive_rate)
+    fp_pixels = np.stack([rng.uniform(0, FRAME_SHAPE[1], num_fp),
+                          rng.uniform(HORIZON_Y, FRAME_SHAPE[0], num_fp)], axis=1)
+    fp_cls = rng.choice([LEFT_CLASS, RIGHT_CLASS], num_fp)
+
+    pixels = np.concatenate([pixels[keep], fp_pixels])
+    cls = np.concatenate([cls[keep], fp_cls])
+
+    h, w = FRAME_SHAPE
+    visible = np.all(np.isfinite(pixels), axis=1)
+    visible &= (pixels[:, 0] >= 0) & (pixels[:, 0] < w) & (pixels[:, 1] >= 0) & (pixels[:, 1] < h)
+    frame = np.column_stack([cls[visible], pixels[visible].astype(int)])
+    return rng.permutation(frame)
+
+
+def generate_session(scene, num_frames, num_cones, seed=0, speed_m_per_frame=0.3, **noise):
+    """A reproducible list of num_frames frames of the given scene."""
+    rng = np.random.default_rng(seed)
+    return [generate_frame(scene, num_cones, rng, offset=i * speed_m_per_frame, **noise) for i in range(num_frames)]
@@ -1,48 +1,145 @@
-from ultralytics import YOLO
-import cv2
+# Inference_model.py
+"""
+Batch inference over the test split.
+
+Each image is decoded once and run through the model in batches. All boxes of
+a batch are normalized to YOLO (cx, cy, w, h) in one vectorized op, and the
+predictions are written to a single JSONL file, one line per image:
+
+    {"image": "0001.jpg", "height": 720, "width": 1280,
+     "detections": [[cls, cx, cy, w, h, conf], ...]}
+
+Per-image YOLO .txt labels (--yolo-txt) and annotated images are optional and
+are written by a thread pool while the next batch is being predicted.
+
+Run from the repository root:
+    python -m src.Inference_model --yolo-txt
+"""
+
+import argparse
+import json
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from src.planning.cone_localization import detect_batch
 
 # === Config ===
-model = YOLO("runs/train/exp/weights/best.pt")
-input_dir = r"C:\Users\Lenovo\Github\FSD-Navigation\data\test\images"
-output_img_dir = r"results/test_inference/images"
-output_lbl_dir = r"results/test_inference/labels"
-
-os.makedirs(output_img_dir, exist_ok=True)
-os.makedirs(output_lbl_dir, exist_ok=True)
-
-# === Inference and Save ===
-for file in os.listdir(input_dir):
-    if not file.endswith(".jpg"):
-        continue
-
-    img_path = os.path.join(input_dir, file)
-    results = model(img_path)[0]  # Only get first result
-
-    # Save annotated image
-    annotated_img = results.plot()
-    cv2.imwrite(os.path.join(output_img_dir, file), annotated_img)
-
-    # Save YOLO-format predictions
-    label_lines = []
-    for box in results.boxes.data.cpu().numpy():
-        cls_id = int(box[5])
-        conf = box[4]
-        x_center, y_center, width, height = box[0:4]
-
-        # Normalize coordinates (0-1)
-        img = cv2.imread(img_path)
-        h, w = img.shape[:2]
-        x_center /= w
-        y_center /= h
-        width /= w
-        height /= h
-
-        line = f"{cls_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f} {conf:.4f}"
-        label_lines.append(line)
-
-    label_filename = file.replace(".jpg", ".txt")
-    with open(os.path.join(output_lbl_dir, label_filename), "w") as f:
-        f.write("\n".join(label_lines))
-
-print("[INFO] ✅ Inference complete. Images and labels saved.")
+MODEL_PATH = "runs/train/exp/weights/best.pt"
+INPUT_DIR = r"C:\Users\Lenovo\Github\FSD-Navigation\data\test\images"
+OUTPUT_DIR = "results/test_inference"
+CONF_THRESHOLD = 0.25
+BATCH_SIZE = 16
+WORKERS = 4
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def to_yolo_rows(batch_boxes, shapes):
+    """
+    Convert one batch of [x1, y1, x2, y2, conf, cls] arrays into normalized
+    [cls, cx, cy, w, h, conf] arrays, one per image. shapes holds each image's (h, w).
+    """
+    counts = [len(boxes) for boxes in batch_boxes]
+    if sum(counts) == 0:
+        return [np.empty((0, 6), dtype=np.float32) for _ in batch_boxes]
+
+    boxes = np.concatenate(batch_boxes)
+    h, w = np.repeat(np.asarray(shapes, dtype=np.float32), counts, axis=0).T
+    xyxy = boxes[:, :4]
+    xywh = np.concatenate([(xyxy[:, :2] + xyxy[:, 2:]) / 2, xyxy[:, 2:] - xyxy[:, :2]], axis=1)
+    xywh /= np.stack([w, h, w, h], axis=1)
+    rows = np.column_stack([boxes[:, 5], xywh, boxes[:, 4]]).astype(np.float32)
+    return np.split(rows, np.cumsum(counts)[:-1])
+
+
+def write_yolo_txt(path, rows):
+    """One '<cls> <cx> <cy> <w> <h> <conf>' line per box (empty file when there are none)."""
+    with open(path, "w") as f:
+        f.write("\n".join(f"{int(c)} {x:.6f} {y:.6f} {bw:.6f} {bh:.6f} {conf:.4f}" for c, x, y, bw, bh, conf in rows))
+
+
+def write_annotated(path, image, boxes, names):
+    """Draw [x1, y1, x2, y2, conf, cls] boxes with class name and confidence, and save the image."""
+    for x1, y1, x2, y2, conf, cls in boxes:
+        p1, p2 = (int(x1), int(y1)), (int(x2), int(y2))
+        cv2.rectangle(image, p1, p2, (0, 255, 0), 2)
+        cv2.putText(image, f"{names[int(cls)]} {conf:.2f}", (p1[0], max(p1[1] - 5, 12)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+    cv2.imwrite(path, image)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the cone detector over a folder of test images.")
+    parser.add_argument("--input", default=INPUT_DIR)
+    parser.add_argument("--output", default=OUTPUT_DIR)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--conf", type=float, default=CONF_THRESHOLD)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="threads for decoding and writing outputs")
+    parser.add_argument("--yolo-txt", action="store_true", help="also write one YOLO-format .txt label per image")
+    parser.add_argument("--no-images", action="store_true", help="skip the annotated images")
+    args = parser.parse_args()
+
+    img_dir = os.path.join(args.output, "images")
+    lbl_dir = os.path.join(args.output, "labels")
+    if not args.no_images:
+        os.makedirs(img_dir, exist_ok=True)
+    if args.yolo_txt:
+        os.makedirs(lbl_dir, exist_ok=True)
+    os.makedirs(args.output, exist_ok=True)
+    predictions_path = os.path.join(args.output, "predictions.jsonl")
+
+    model = YOLO(args.model)
+    names = model.names
+    files = sorted(f for f in os.listdir(args.input) if f.lower().endswith(IMAGE_EXTENSIONS))
+
+    pending = deque()  # output writes still running in the pool
+    max_pending = args.batch_size * max(args.workers, 1) * 2
+    num_images = num_boxes = 0
+
+    # === Inference and Save ===
+    with ThreadPoolExecutor(max_workers=args.workers) as pool, open(predictions_path, "w") as out:
+        for start in range(0, len(files), args.batch_size):
+            batch_files = files[start:start + args.batch_size]
+            decoded = pool.map(cv2.imread, [os.path.join(args.input, f) for f in batch_files])
+            loaded = [(f, img) for f, img in zip(batch_files, decoded) if img is not None]
+            for f in set(batch_files) - {f for f, _ in loaded}:
+                print(f"[WARNING] Could not read image: {f}")
+            if not loaded:
+                continue
+
+            batch_files = [f for f, _ in loaded]
+            images = [img for _, img in loaded]
+            shapes = [img.shape[:2] for img in images]
+            batch_boxes = detect_batch(model, images, conf=args.conf)
+
+            for file, (h, w), boxes, rows in zip(batch_files, shapes, batch_boxes, to_yolo_rows(batch_boxes, shapes)):
+                out.write(json.dumps({"image": file, "height": h, "width": w,
+                                      "detections": np.round(rows.astype(np.float64), 6).tolist()}) + "\n")
+                if args.yolo_txt:
+                    label_path = os.path.join(lbl_dir, os.path.splitext(file)[0] + ".txt")
+                    pending.append(pool.submit(write_yolo_txt, label_path, rows))
+                num_boxes += len(rows)
+
+            if not args.no_images:
+                for file, image, boxes in zip(batch_files, images, batch_boxes):
+                    pending.append(pool.submit(write_annotated, os.path.join(img_dir, file), image, boxes, names))
+
+            # Keep the write backlog bounded; result() re-raises worker errors
+            while len(pending) > max_pending:
+                pending.popleft().result()
+            num_images += len(images)
+            print(f"[INFO] {num_images}/{len(files)} images")
+
+        while pending:
+            pending.popleft().result()
+
+    print(f"[INFO] ✅ Inference complete: {num_boxes} boxes on {num_images} images saved to {predictions_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,118 @@
+# Video_inference.py
+"""
+Run the detector over a video and export the annotated frames as MP4 or GIF.
+
+Frames are written as they are produced, so memory stays constant and whole
+laps can be rendered. The output format follows the file extension: .mp4 goes
+through cv2.VideoWriter, .gif through imageio's append-mode writer.
+
+Run from the repository root:
+    python -m src.Video_inference --output Test_videos/onnx_demo_output.mp4 --stride 2 --scale 0.5
+"""
+
+import argparse
+import os
+
 import cv2
-import imageio
 from ultralytics import YOLO
-from pathlib import Path
 
 # === CONFIG ===
 video_path = r"C:\Users\Lenovo\Github\FSD-Navigation\Test_videos\Skidpad_FSE.mp4"
 model_path = r"C:\Users\Lenovo\Github\FSD-Navigation\runs\train\exp\weights\best.onnx"
 gif_output_path = r"C:\Users\Lenovo\Github\FSD-Navigation\Test_videos\onnx_demo_output.gif"
+DEFAULT_FPS = 20.0  # used when the video does not report its frame rate
+
+
+class StreamingVideoWriter:
+    """Append BGR frames to an .mp4 (cv2.VideoWriter) or .gif (imageio) file one at a time."""
+
+    def __init__(self, path, fps):
+        self.path = path
+        self.fps = fps
+        self.is_gif = path.lower().endswith(".gif")
+        self._writer = None
+        if self.is_gif:
+            import imageio  # only needed for GIF export
+            self._writer = imageio.get_writer(path, mode="I", duration=1.0 / fps)
+
+    def write(self, frame):
+        if self.is_gif:
+            self._writer.append_data(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            return
+        if self._writer is None:
+            # Frame size is only known once the first frame arrives
+            h, w = frame.shape[:2]
+            self._writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (w, h))
+            if not self._writer.isOpened():
+                raise IOError(f"Could not open video writer: {self.path}")
+        self._writer.write(frame)
+
+    def close(self):
+        if self._writer is None:
+            return
+        if self.is_gif:
+            self._writer.close()
+        else:
+            self._writer.release()
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Annotate a video with cone detections and save it as MP4 or GIF.")
+    parser.add_argument("--video", default=video_path)
+    parser.add_argument("--model", default=model_path)
+    parser.add_argument("--output", default=gif_output_path, help="output file; .mp4 or .gif")
+    parser.add_argument("--stride", type=int, default=1, help="process every Nth frame")
+    parser.add_argument("--scale", type=float, default=1.0, help="downscale factor for the exported frames")
+    parser.add_argument("--max-frames", type=int, default=None, help="stop after this many exported frames")
+    args = parser.parse_args()
 
-# === Load model ===
-model = YOLO(model_path)
+    if not args.output.lower().endswith((".mp4", ".gif")):
+        parser.error("--output must end in .mp4 or .gif")
 
-# === Read video ===
-cap = cv2.VideoCapture(video_path)
-frames = []
-frame_count = 0
-max_frames = 100  # Limit GIF length to avoid large files
+    # === Load model ===
+    model = YOLO(args.model)
 
-while True:
-    ret, frame = cap.read()
-    if not ret or frame_count >= max_frames:
-        break
+    # === Read video ===
+    cap = cv2.VideoCapture(args.video)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {args.video}")
+    fps = (cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS) / args.stride
 
-    # Run YOLO inference
-    results = model(frame)
-    annotated = results[0].plot()  # Draw bounding boxes
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    frame_idx = 0
+    frame_count = 0
+    with StreamingVideoWriter(args.output, fps) as writer:
+        while args.max_frames is None or frame_count < args.max_frames:
+            # Skipped frames are only grabbed, not decoded
+            if frame_idx % args.stride:
+                if not cap.grab():
+                    break
+                frame_idx += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_idx += 1
 
-    # Convert BGR to RGB and resize (optional)
-    annotated_rgb = cv2.cvtColor(annotated, cv2.COLOR_BGR2RGB)
-    frames.append(annotated_rgb)
+            # Run YOLO inference
+            results = model(frame, verbose=False)
+            annotated = results[0].plot()  # Draw bounding boxes
+            if args.scale != 1.0:
+                annotated = cv2.resize(annotated, None, fx=args.scale, fy=args.scale, interpolation=cv2.INTER_AREA)
 
-    frame_count += 1
+            writer.write(annotated)
+            frame_count += 1
 
-cap.release()
+    cap.release()
+    print(f"[INFO] ✅ {frame_count} frames saved to: {args.output}")
 
-# === Save as GIF using imageio ===
-imageio.mimsave(gif_output_path, frames, duration=0.05)  # duration in seconds per frame
 
-print(f"[INFO] ✅ GIF saved to: {gif_output_path}")
+if __name__ == "__main__":
+    main()
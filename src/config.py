@@ -0,0 +1,28 @@
+# src/config.py
+
+# === MODEL ===
+YOLO_MODEL_PATH = "models/yolov5/best.pt"
+ONNX_MODEL_PATH = "models/yolov5/best.onnx"
+INFERENCE_IMAGE_SIZE = 512  # imgsz used for training and export
+
+# === DETECTION ===
+DETECTION_CONFIDENCE_THRESHOLD = 0.25
+NMS_IOU_THRESHOLD = 0.45
+
+# Class names in label-ID order (see data/data.yaml)
+CONE_CLASSES = ["blue_cone", "knocked_over", "large_orange_cone", "orange_cone", "yellow_cone"]
+
+# === DATASET ===
+DATASET_DIR = "data/fc-reali-fscoco-2.v2i.yolov5pytorch"  # YOLOv5 export: <split>/images, <split>/labels, data.yaml
+DATASET_SPLITS = ("train", "valid", "test")
+
+# === CAMERA ===
+# Pinhole model of the onboard camera, used to project cone pixels onto the ground
+# plane (src/planning/ground_projection.py). Replace with your calibration.
+CAMERA_RESOLUTION = (640, 480)  # (w, h) the intrinsics below were calibrated at
+CAMERA_FX = 500.0  # focal lengths, px
+CAMERA_FY = 500.0
+CAMERA_CX = 320.0  # principal point, px
+CAMERA_CY = 216.0
+CAMERA_HEIGHT_M = 1.0  # lens height above the ground
+CAMERA_PITCH_DEG = 0.0  # downward tilt of the optical axis
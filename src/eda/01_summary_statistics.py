@@ -1,14 +1,9 @@
 import os
-from pathlib import Path
 import matplotlib.pyplot as plt
 
-def compute_annotation_stats(label_dir):
-    annotation_count = 0
-    for label_file in Path(label_dir).rglob("*.txt"):
-        with open(label_file, "r") as f:
-            lines = f.readlines()
-            annotation_count += len([l for l in lines if l.strip()])
-    return annotation_count
+from src.config import DATASET_SPLITS
+from src.eda.label_index import load_index
+
 
 def annotate_bars(ax, bars):
     """Add value labels on top of bars"""
@@ -20,25 +15,18 @@ def annotate_bars(ax, bars):
                     textcoords="offset points",
                     ha='center', va='bottom', fontsize=9)
 
-def compute_summary_stats(data_dir):
-    sets = ["train", "valid", "test"]
+def compute_summary_stats(index):
     stats = {"split": [], "images": [], "labels": [], "annotations": []}
 
-    for split in sets:
-        img_dir = Path(data_dir) / split / "images"
-        label_dir = Path(data_dir) / split / "labels"
-
-        num_images = len(list(img_dir.glob("*.jpg"))) + len(list(img_dir.glob("*.png")))
-        num_labels = len(list(label_dir.glob("*.txt")))
-        total_annotations = compute_annotation_stats(label_dir)
-
+    for split in DATASET_SPLITS:
+        files = index.split_mask(split)
         stats["split"].append(split)
-        stats["images"].append(num_images)
-        stats["labels"].append(num_labels)
-        stats["annotations"].append(total_annotations)
+        stats["images"].append(int(index.files["has_image"][files].sum()))
+        stats["labels"].append(int(index.files["has_label"][files].sum()))
+        stats["annotations"].append(int(index.split_mask(split, table="boxes").sum()))
 
     # Bar chart
-    x = range(len(sets))
+    x = range(len(DATASET_SPLITS))
     width = 0.25
 
     fig, ax = plt.subplots(figsize=(10, 6))
@@ -63,4 +51,4 @@ def compute_summary_stats(data_dir):
     plt.close()
 
 if __name__ == "__main__":
-    compute_summary_stats("data/fc-reali-fscoco-2.v2i.yolov5pytorch")
+    compute_summary_stats(load_index())
@@ -1,88 +1,73 @@
 import os
 import cv2
-from pathlib import Path
+import numpy as np
 import yaml
-from collections import defaultdict
+
+from src.config import DATASET_DIR
+from src.eda.label_index import load_index
 
 # === CONFIG ===
-dataset_dir = r"C:\Users\Lenovo\Github\FSD-Navigation\data\fc-reali-fscoco-2.v2i.yolov5pytorch"
-root_dir = r"C:\Users\Lenovo\Github\FSD-Navigation"
-splits = ['train', 'valid', 'test']
-output_dir = os.path.join(root_dir, 'src' , 'eda', 'eda_outputs' , '05_verify_class_ids')
-os.makedirs(output_dir, exist_ok=True)
-
-# === Load class names from data.yaml ===
-yaml_path = os.path.join(dataset_dir, 'data.yaml')
-with open(yaml_path, 'r') as f:
-    data_yaml = yaml.safe_load(f)
-names = data_yaml['names']
-num_classes = len(names)
-
-# === Collect only fully valid samples per class ===
-class_to_samples = defaultdict(list)
-for split in splits:
-    img_dir = os.path.join(dataset_dir, split, 'images')
-    lbl_dir = os.path.join(dataset_dir, split, 'labels')
-
-    for label_file in os.listdir(lbl_dir):
-        if not label_file.endswith('.txt'):
+dataset_dir = DATASET_DIR
+output_dir = os.path.join('src', 'eda', 'eda_outputs', '05_verify_class_ids')
+
+
+def main():
+    os.makedirs(output_dir, exist_ok=True)
+
+    # === Load class names from data.yaml ===
+    yaml_path = os.path.join(dataset_dir, 'data.yaml')
+    with open(yaml_path, 'r') as f:
+        data_yaml = yaml.safe_load(f)
+    names = data_yaml['names']
+    num_classes = len(names)
+
+    # === Find fully valid samples per class ===
+    index = load_index(dataset_dir)
+    boxes = index.boxes
+    valid = boxes["valid"]
+    # Distinct (file, class) pairs, sorted by file
+    pairs = np.unique(np.stack([boxes["file"][valid], boxes["cls"][valid]], axis=1), axis=0)
+    classes_per_file = np.bincount(pairs[:, 0], minlength=len(index))
+
+    # Only keep files whose labels are all the same class and that have an image
+    single = pairs[(classes_per_file[pairs[:, 0]] == 1) & index.files["has_image"][pairs[:, 0]]]
+    sample_classes, first = np.unique(single[:, 1], return_index=True)
+    class_to_sample = dict(zip(sample_classes.tolist(), single[first, 0].tolist()))
+
+    # === Visualize ONE clean image per class ===
+    for class_id in range(num_classes):
+        if class_id not in class_to_sample:
+            print(f"[WARNING] No valid sample found for class ID {class_id}")
             continue
 
-        lbl_path = os.path.join(lbl_dir, label_file)
-        img_path = os.path.join(img_dir, label_file.replace('.txt', '.jpg'))
-        if not os.path.exists(img_path):
+        file_idx = class_to_sample[class_id]
+        img = cv2.imread(index.image_path(file_idx))
+        if img is None:
             continue
+        h, w = img.shape[:2]
 
-        with open(lbl_path, 'r') as f:
-            lines = [line.strip() for line in f if line.strip()]
-
-        class_ids = [int(line.split()[0]) for line in lines if len(line.split()) == 5]
-
-        # Only keep if all labels are the same class
-        if len(set(class_ids)) == 1:
-            single_class_id = class_ids[0]
-            class_to_samples[single_class_id].append((img_path, lbl_path))
-
-# === Visualize ONE clean image per class ===
-for class_id in range(num_classes):
-    if class_id not in class_to_samples:
-        print(f"[WARNING] No valid sample found for class ID {class_id}")
-        continue
+        class_name = names[class_id]
+        header = f"Class ID: {class_id} | Name: {class_name}"
+        cv2.putText(img, header, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
 
-    img_path, lbl_path = class_to_samples[class_id][0]
-    img = cv2.imread(img_path)
-    if img is None:
-        continue
-    h, w = img.shape[:2]
-
-    class_name = names[class_id]
-    header = f"Class ID: {class_id} | Name: {class_name}"
-    cv2.putText(img, header, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
-
-    with open(lbl_path, 'r') as f:
-        lines = [line.strip() for line in f if line.strip()]
-
-    for line in lines:
-        parts = line.split()
-        if len(parts) != 5:
-            continue
-        cid, x, y, bw, bh = map(float, parts)
-        cid = int(cid)
+        rows = index.file_boxes(file_idx)
+        keep = rows["valid"] & (rows["cls"] == class_id)
+        for x, y, bw, bh in zip(rows["x"][keep], rows["y"][keep], rows["w"][keep], rows["h"][keep]):
+            label = names[class_id]
+            cx, cy = int(x * w), int(y * h)
+            bw, bh = int(bw * w), int(bh * h)
+            x1, y1 = cx - bw // 2, cy - bh // 2
+            x2, y2 = cx + bw // 2, cy + bh // 2
 
-        if cid != class_id:
-            continue  # Skip other classes
+            color = (0, 255, 0)
+            cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(img, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 1)
 
-        label = names[cid]
-        cx, cy = int(x * w), int(y * h)
-        bw, bh = int(bw * w), int(bh * h)
-        x1, y1 = cx - bw // 2, cy - bh // 2
-        x2, y2 = cx + bw // 2, cy + bh // 2
+        out_path = os.path.join(output_dir, f"class_check_{class_id}_{class_name}.png")
+        cv2.imwrite(out_path, img)
 
-        color = (0, 255, 0)
-        cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
-        cv2.putText(img, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 1)
+    print(f"[INFO] ✅ Verified images saved to: {output_dir}")
 
-    out_path = os.path.join(output_dir, f"class_check_{class_id}_{class_name}.png")
-    cv2.imwrite(out_path, img)
 
-print(f"[INFO] ✅ Verified images saved to: {output_dir}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# label_index.py
+"""
+Columnar index of the YOLO labels of every split, shared by the EDA scripts.
+
+Label files are parsed once, in a process pool, into flat arrays cached in an
+.npz file. Later runs only re-parse label files whose mtime or size changed and
+pick up added or removed files, so refreshing the plots costs a directory
+listing plus a cache load.
+
+    index = load_index()
+    index.files  # one row per image/label stem: split, stem, image_ext, has_image, has_label, ...
+    index.boxes  # one row per label line: file, cls, x, y, w, h, valid
+
+Rows of index.boxes belonging to file i are boxes[offsets[i]:offsets[i + 1]].
+
+Run from the repository root to (re)build the cache:
+    python -m src.eda.label_index
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.config import DATASET_DIR, DATASET_SPLITS
+
+# === CONFIG ===
+CACHE_PATH = "outputs/eda/label_index.npz"
+IMAGE_EXTENSIONS = (".jpg", ".png")  # first match wins when a stem has both
+MIN_FILES_FOR_POOL = 256  # below this, parsing in-process beats starting workers
+CACHE_VERSION = 1
+
+FILE_COLUMNS = ("split", "stem", "image_ext", "has_image", "has_label", "label_mtime_ns", "label_size")
+BOX_COLUMNS = ("file", "cls", "x", "y", "w", "h", "valid")
+
+
+def parse_label_file(path):
+    """
+    Parse one YOLO label file into an (N, 5) float32 array of [cls, x, y, w, h]
+    and an (N,) bool array that is True for well-formed 5-field lines.
+
+    Blank lines are skipped; fields missing from short or unparsable lines are NaN.
+    """
+    with open(path, "r") as f:
+        lines = [line.split() for line in f if line.strip()]
+
+    rows = np.full((len(lines), 5), np.nan, dtype=np.float32)
+    valid = np.zeros(len(lines), dtype=bool)
+    for i, parts in enumerate(lines):
+        try:
+            values = [float(p) for p in parts[:5]]
+        except ValueError:
+            continue
+        rows[i, :len(values)] = values
+        valid[i] = len(parts) == 5
+    return rows, valid
+
+
+def _scan_split(data_dir, split):
+    """Image extension per stem, and (mtime_ns, size) of each label file per stem."""
+    images, labels = {}, {}
+    img_dir = os.path.join(data_dir, split, "images")
+    lbl_dir = os.path.join(data_dir, split, "labels")
+
+    if os.path.isdir(img_dir):
+        for entry in os.scandir(img_dir):
+            stem, ext = os.path.splitext(entry.name)
+            if ext in IMAGE_EXTENSIONS and (stem not in images or ext == IMAGE_EXTENSIONS[0]):
+                images[stem] = ext
+    if os.path.isdir(lbl_dir):
+        for entry in os.scandir(lbl_dir):
+            stem, ext = os.path.splitext(entry.name)
+            if ext == ".txt":
+                stat = entry.stat()
+                labels[stem] = (stat.st_mtime_ns, stat.st_size)
+    return images, labels
+
+
+class LabelIndex:
+    """File and box tables of the label index, as dicts of equal-length NumPy columns."""
+
+    def __init__(self, data_dir, files, boxes, offsets):
+        self.data_dir = data_dir
+        self.files = files
+        self.boxes = boxes
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.files["stem"])
+
+    def split_mask(self, split, table="files"):
+        """Boolean mask of the file (or box) rows that belong to `split`."""
+        split_id = DATASET_SPLITS.index(split)
+        if table == "files":
+            return self.files["split"] == split_id
+        return self.files["split"][self.boxes["file"]] == split_id
+
+    def image_path(self, i):
+        split = DATASET_SPLITS[self.files["split"][i]]
+        return os.path.join(self.data_dir, split, "images", self.files["stem"][i] + self.files["image_ext"][i])
+
+    def label_path(self, i):
+        split = DATASET_SPLITS[self.files["split"][i]]
+        return os.path.join(self.data_dir, split, "labels", self.files["stem"][i] + ".txt")
+
+    def file_boxes(self, i):
+        """Box rows of file i, as a dict of columns."""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return {name: col[start:end] for name, col in self.boxes.items()}
+
+    def save(self, cache_path):
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        tmp_path = cache_path + ".tmp.npz"  # np.savez appends .npz otherwise
+        np.savez(tmp_path, version=CACHE_VERSION, data_dir=os.path.abspath(self.data_dir), offsets=self.offsets,
+                 **{f"files_{k}": v for k, v in self.files.items()},
+                 **{f"boxes_{k}": v for k, v in self.boxes.items()})
+        os.replace(tmp_path, cache_path)
+
+    @classmethod
+    def from_cache(cls, cache_path, data_dir):
+        """The cached index for data_dir, or None when the cache is missing, stale-format or for another dataset."""
+        if not os.path.exists(cache_path):
+            return None
+        with np.load(cache_path) as cache:
+            if int(cache["version"]) != CACHE_VERSION or str(cache["data_dir"]) != os.path.abspath(data_dir):
+                return None
+            files = {k: cache[f"files_{k}"] for k in FILE_COLUMNS}
+            boxes = {k: cache[f"boxes_{k}"] for k in BOX_COLUMNS}
+            return cls(data_dir, files, boxes, cache["offsets"])
+
+
+def build_index(data_dir=DATASET_DIR, cache_path=CACHE_PATH, workers=None, rebuild=False):
+    """
+    Return an up-to-date LabelIndex for data_dir, refreshing the cache at cache_path.
+
+    Only label files that are new or whose mtime/size differ from the cache are
+    parsed; the rest are copied from the cached arrays. rebuild=True ignores the cache.
+    """
+    old = None if rebuild else LabelIndex.from_cache(cache_path, data_dir)
+    old_rows = {}
+    if old is not None:
+        for i, (split, stem) in enumerate(zip(old.files["split"], old.files["stem"])):
+            old_rows[(int(split), str(stem))] = i
+
+    # === Scan directories ===
+    records = []  # (split_id, stem, image_ext, has_label, mtime_ns, size)
+    for split_id, split in enumerate(DATASET_SPLITS):
+        images, labels = _scan_split(data_dir, split)
+        for stem in sorted(images.keys() | labels.keys()):
+            mtime_ns, size = labels.get(stem, (0, 0))
+            records.append((split_id, stem, images.get(stem, ""), stem in labels, mtime_ns, size))
+
+    # === Reuse unchanged files, parse the rest ===
+    parsed = [None] * len(records)
+    to_parse = []
+    for n, (split_id, stem, _, has_label, mtime_ns, size) in enumerate(records):
+        if not has_label:
+            parsed[n] = (np.empty((0, 5), dtype=np.float32), np.empty(0, dtype=bool))
+            continue
+        i = old_rows.get((split_id, stem))
+        if i is not None and old.files["has_label"][i] and old.files["label_mtime_ns"][i] == mtime_ns \
+                and old.files["label_size"][i] == size:
+            rows = old.file_boxes(i)
+            parsed[n] = (np.column_stack([rows["cls"], rows["x"], rows["y"], rows["w"], rows["h"]]).astype(np.float32),
+                         rows["valid"])
+        else:
+            to_parse.append(n)
+
+    paths = [os.path.join(data_dir, DATASET_SPLITS[records[n][0]], "labels", records[n][1] + ".txt") for n in to_parse]
+    if len(paths) >= MIN_FILES_FOR_POOL:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(parse_label_file, paths, chunksize=max(1, len(paths) // 64)))
+    else:
+        results = [parse_label_file(path) for path in paths]
+    for n, result in zip(to_parse, results):
+        parsed[n] = result
+
+    # === Assemble columns ===
+    counts = np.array([len(rows) for rows, _ in parsed], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    all_rows = np.concatenate([rows for rows, _ in parsed]) if len(parsed) else np.empty((0, 5), dtype=np.float32)
+
+    files = {
+        "split": np.array([r[0] for r in records], dtype=np.int8),
+        "stem": np.array([r[1] for r in records], dtype=str),
+        "image_ext": np.array([r[2] for r in records], dtype="<U8"),
+        "has_image": np.array([bool(r[2]) for r in records], dtype=bool),
+        "has_label": np.array([r[3] for r in records], dtype=bool),
+        "label_mtime_ns": np.array([r[4] for r in records], dtype=np.int64),
+        "label_size": np.array([r[5] for r in records], dtype=np.int64),
+    }
+    boxes = {
+        "file": np.repeat(np.arange(len(records), dtype=np.int32), counts),
+        "cls": np.where(np.isnan(all_rows[:, 0]), -1, all_rows[:, 0]).astype(np.int16),
+        "x": all_rows[:, 1],
+        "y": all_rows[:, 2],
+        "w": all_rows[:, 3],
+        "h": all_rows[:, 4],
+        "valid": np.concatenate([valid for _, valid in parsed]) if len(parsed) else np.empty(0, dtype=bool),
+    }
+
+    index = LabelIndex(data_dir, files, boxes, offsets)
+    index.save(cache_path)
+    print(f"[INFO] ✅ Label index: {len(records)} files, {len(all_rows)} boxes "
+          f"({len(to_parse)} label files parsed, {int(files['has_label'].sum()) - len(to_parse)} cached) -> {cache_path}")
+    return index
+
+
+def load_index(data_dir=DATASET_DIR, cache_path=CACHE_PATH, workers=None):
+    """Entry point for the EDA scripts: the label index, rebuilt incrementally if needed."""
+    return build_index(data_dir, cache_path, workers=workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the cached YOLO label index.")
+    parser.add_argument("--data-dir", default=DATASET_DIR)
+    parser.add_argument("--cache", default=CACHE_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the cache and parse every label file")
+    args = parser.parse_args()
+    build_index(args.data_dir, args.cache, workers=args.workers, rebuild=args.rebuild)
+
+
+if __name__ == "__main__":
+    main()
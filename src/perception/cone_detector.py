@@ -1,29 +1,98 @@
 # src/perception/cone_detector.py
 
 import cv2
-import torch
 import numpy as np
-from src.config import YOLO_MODEL_PATH, CONE_CLASSES, DETECTION_CONFIDENCE_THRESHOLD
+from src.config import YOLO_MODEL_PATH, ONNX_MODEL_PATH, CONE_CLASSES, DETECTION_CONFIDENCE_THRESHOLD
+
+BACKENDS = ("torch", "onnx")
+
+# One row per detected cone; bbox is (x1, y1, x2, y2) and center is (cx, cy) in frame pixels
+DETECTION_DTYPE = np.dtype([
+    ("bbox", np.int32, (4,)),
+    ("conf", np.float32),
+    ("class_id", np.int16),
+    ("center", np.int32, (2,)),
+])
+# Same fields plus the index of the frame in the batch, for detect_batch(..., flat=True)
+FLAT_DETECTION_DTYPE = np.dtype([("frame_idx", np.int32)] + DETECTION_DTYPE.descr)
+
+
+def to_structured(rows, dtype=DETECTION_DTYPE):
+    """Convert (N, 6) [x1, y1, x2, y2, conf, cls] rows into a DETECTION_DTYPE array."""
+    rows = np.asarray(rows).reshape(-1, 6)
+    out = np.empty(len(rows), dtype=dtype)
+    out["bbox"] = rows[:, :4]
+    out["conf"] = rows[:, 4]
+    out["class_id"] = rows[:, 5]
+    out["center"] = (out["bbox"][:, :2] + out["bbox"][:, 2:]) // 2
+    return out
+
 
 class ConeDetector:
-    def __init__(self, model_path=YOLO_MODEL_PATH, confidence_threshold=DETECTION_CONFIDENCE_THRESHOLD):
-        self.model = torch.hub.load('ultralytics/yolov5', 'custom', path=model_path, force_reload=False)
-        self.model.conf = confidence_threshold
+    """
+    backend="torch" loads best.pt through torch.hub (needs network access the first time).
+    backend="onnx" runs best.onnx in onnxruntime on CPU without importing torch;
+    intra_op_threads / inter_op_threads tune its thread pools (0 = onnxruntime default).
+
+    classes: optional class-ID whitelist (e.g. (0, 4) for blue and yellow cones),
+    applied inside the model's post-processing so other classes cost nothing.
+    """
+
+    def __init__(self, model_path=None, confidence_threshold=DETECTION_CONFIDENCE_THRESHOLD,
+                 backend="torch", intra_op_threads=0, inter_op_threads=0, classes=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        self.backend = backend
+
+        if backend == "onnx":
+            from src.perception.onnx_backend import OnnxYoloBackend
+            self.model = OnnxYoloBackend(model_path or ONNX_MODEL_PATH, conf=confidence_threshold,
+                                         intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads,
+                                         classes=classes)
+        else:
+            import torch
+            self.model = torch.hub.load('ultralytics/yolov5', 'custom', path=model_path or YOLO_MODEL_PATH,
+                                        force_reload=False)
+            self.model.conf = confidence_threshold
+            self.model.classes = None if classes is None else list(classes)  # filtered during NMS
         self.classes = CONE_CLASSES
 
+    def _predict_batch(self, images):
+        """Raw detections per frame as (N, 6) arrays of [x1, y1, x2, y2, conf, cls]."""
+        if self.backend == "onnx":
+            return self.model.predict_batch(images)
+        return [det.cpu().numpy() for det in self.model(list(images)).xyxy]
+
+    def detect_batch(self, images, flat=False):
+        """
+        Detect cones in a list of frames.
+
+        Returns one DETECTION_DTYPE array per frame, or with flat=True a single
+        FLAT_DETECTION_DTYPE array whose frame_idx field gives each row's frame.
+        """
+        per_frame = self._predict_batch(images)
+        if not flat:
+            return [to_structured(rows) for rows in per_frame]
+
+        counts = [len(rows) for rows in per_frame]
+        rows = np.concatenate(per_frame) if sum(counts) else np.empty((0, 6), dtype=np.float32)
+        out = to_structured(rows, FLAT_DETECTION_DTYPE)
+        out["frame_idx"] = np.repeat(np.arange(len(per_frame)), counts)
+        return out
+
+    def class_names(self, class_ids):
+        """Resolve class IDs (e.g. detections["class_id"]) to names on demand."""
+        return [self.classes[int(i)] for i in class_ids]
+
     def detect_cones(self, image):
-        results = self.model(image)
-        detections = results.xyxy[0].cpu().numpy()
+        detections = self.detect_batch([image])[0]
 
         cones = []
-        for det in detections:
-            x1, y1, x2, y2, conf, cls = det
-            if conf >= self.model.conf:
-                class_name = self.classes[int(cls)]
-                cones.append({
-                    "bbox": (int(x1), int(y1), int(x2), int(y2)),
-                    "confidence": float(conf),
-                    "class_id": int(cls),
-                    "class_name": class_name
-                })
+        for det, class_name in zip(detections, self.class_names(detections["class_id"])):
+            cones.append({
+                "bbox": tuple(int(v) for v in det["bbox"]),
+                "confidence": float(det["conf"]),
+                "class_id": int(det["class_id"]),
+                "class_name": class_name
+            })
         return cones
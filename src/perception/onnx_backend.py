@@ -0,0 +1,150 @@
+# src/perception/onnx_backend.py
+
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+from src.config import CONE_CLASSES, INFERENCE_IMAGE_SIZE, NMS_IOU_THRESHOLD
+
+PAD_VALUE = 114  # letterbox border colour used by YOLO
+MAX_NMS = 30000  # highest-scoring candidates passed to NMS, as in ultralytics
+
+
+def nms(boxes, scores, iou_threshold):
+    """Greedy NMS over (N, 4) xyxy boxes; returns kept indices, highest score first."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(scores)[::-1]
+
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iw = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        ih = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = iw * ih
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=int)
+
+
+class OnnxYoloBackend:
+    """
+    Run an exported YOLO model (best.onnx) directly in onnxruntime on CPU.
+
+    Calling the backend with a BGR frame returns an (N, 6) float32 array of
+    [x1, y1, x2, y2, conf, cls] in frame pixels, like results.xyxy[0] from the
+    torch hub model. predict_batch() does the same for a list of frames, in a
+    single session run when the model was exported with a dynamic batch axis.
+
+    classes: optional class-ID whitelist; other classes are dropped from the
+    raw scores, before thresholding, box conversion and NMS.
+    """
+
+    def __init__(self, model_path, conf=0.25, iou=NMS_IOU_THRESHOLD, imgsz=INFERENCE_IMAGE_SIZE,
+                 intra_op_threads=0, inter_op_threads=0, max_det=300, classes=None):
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads  # 0 lets onnxruntime decide
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch, _, height, width = model_input.shape
+        # Dynamic axes come through as strings/None; fall back to the configured size
+        self.input_hw = (height if isinstance(height, int) else imgsz, width if isinstance(width, int) else imgsz)
+        self.dynamic_batch = not isinstance(batch, int)
+
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+        self.num_classes = len(CONE_CLASSES)
+        self.classes = None if classes is None else np.asarray(sorted(classes), dtype=int)
+
+        # Reused for every frame: the letterboxed canvas and the NCHW float input tensor(s)
+        self._canvas = np.full((*self.input_hw, 3), PAD_VALUE, dtype=np.uint8)
+        self._inputs = {}  # batch size -> input buffer
+        self._geometry = None  # (frame h, frame w) -> scale and padding of the last letterbox
+
+    def _input_buffer(self, batch_size):
+        if batch_size not in self._inputs:
+            self._inputs[batch_size] = np.empty((batch_size, 3, *self.input_hw), dtype=np.float32)
+        return self._inputs[batch_size]
+
+    def _letterbox(self, image, out):
+        h, w = image.shape[:2]
+        if self._geometry is None or self._geometry[0] != (h, w):
+            in_h, in_w = self.input_hw
+            scale = min(in_h / h, in_w / w)
+            new_w, new_h = int(round(w * scale)), int(round(h * scale))
+            left, top = (in_w - new_w) // 2, (in_h - new_h) // 2
+            self._canvas[:] = PAD_VALUE
+            self._geometry = ((h, w), scale, left, top, new_w, new_h)
+
+        _, scale, left, top, new_w, new_h = self._geometry
+        self._canvas[top:top + new_h, left:left + new_w] = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+        # BGR HWC uint8 -> RGB CHW float32 in [0, 1], written into the reused input buffer
+        np.multiply(self._canvas[:, :, ::-1].transpose(2, 0, 1), 1 / 255.0, out=out, casting="unsafe")
+        return scale, left, top
+
+    def _decode(self, pred):
+        # YOLOv5 exports (N, 5 + nc) rows with objectness; anchor-free (v5u/v8) exports (4 + nc, N)
+        if pred.shape[0] in (4 + self.num_classes, 5 + self.num_classes) and pred.shape[0] < pred.shape[1]:
+            pred = pred.T
+        if pred.shape[1] == 5 + self.num_classes:
+            scores = pred[:, 5:]
+            objectness = pred[:, 4:5]
+        else:
+            scores = pred[:, 4:]
+            objectness = None
+
+        if self.classes is not None:
+            scores = scores[:, self.classes]
+        if objectness is not None:
+            scores = scores * objectness
+
+        best = np.argmax(scores, axis=1)
+        confs = scores[np.arange(len(scores)), best]
+        keep = np.flatnonzero(confs >= self.conf)
+        if len(keep) > MAX_NMS:
+            keep = keep[np.argpartition(confs[keep], -MAX_NMS)[-MAX_NMS:]]
+        class_ids = best[keep] if self.classes is None else self.classes[best[keep]]
+        return pred[keep, :4], confs[keep], class_ids
+
+    def _postprocess(self, pred, geometry, image_shape):
+        xywh, confs, class_ids = self._decode(pred)
+        if len(confs) == 0:
+            return np.empty((0, 6), dtype=np.float32)
+
+        # xywh (letterboxed input pixels) -> xyxy (frame pixels)
+        scale, left, top = geometry
+        boxes = np.empty_like(xywh)
+        boxes[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+        boxes[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+        boxes -= (left, top, left, top)
+        boxes /= scale
+        h, w = image_shape[:2]
+        np.clip(boxes, 0, (w, h, w, h), out=boxes)
+
+        # Class-aware NMS: shift each class into its own coordinate range
+        offset = class_ids[:, None] * (max(h, w) + 1)
+        keep = nms(boxes + offset, confs, self.iou)[:self.max_det]
+        return np.column_stack([boxes[keep], confs[keep], class_ids[keep]]).astype(np.float32)
+
+    def predict_batch(self, images):
+        """Detections for each frame in images, as a list of (N, 6) arrays."""
+        if not self.dynamic_batch and len(images) > 1:
+            return [self(image) for image in images]
+
+        inputs = self._input_buffer(len(images))
+        geometries = [self._letterbox(image, inputs[i]) for i, image in enumerate(images)]
+        output = self.session.run(None, {self.input_name: inputs})[0]
+        return [self._postprocess(output[i], geometry, image.shape)
+                for i, (geometry, image) in enumerate(zip(geometries, images))]
+
+    def __call__(self, image):
+        return self.predict_batch([image])[0]
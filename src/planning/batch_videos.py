@@ -0,0 +1,211 @@
+# batch_videos.py
+"""
+Run the streaming pipeline over a whole directory (or glob) of recorded videos.
+
+Videos are sharded across a process pool. Each worker loads the YOLO model
+once, in its initializer, and then runs stream_pipeline.run_stream on one
+video at a time. Every video gets its own output directory
+(<output>/<video stem>/) with the usual cone store, midpoints.npz,
+trajectory.npz and optional trajectory.mp4.
+
+A finished video leaves a done.json marker with its stats, written last, so a
+re-run skips every video that already has one and redoes any video that was
+interrupted. After each run the markers are merged into <output>/summary.json.
+
+Run from the repository root:
+    python -m src.planning.batch_videos --videos Test_videos --workers 4
+    python -m src.planning.batch_videos --videos "recordings/2024-*/*.mp4" --render
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from src.planning.cone_store import ConeStore
+from src.planning.stream_pipeline import CONF_THRESHOLD, MODEL_PATH, run_stream
+from src.planning.trajectory_fitter import TrajectoryFitter
+
+# === CONFIG ===
+VIDEO_DIR = "Test_videos"
+OUTPUT_DIR = "outputs/batch"
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+DONE_MARKER = "done.json"
+SUMMARY_FILE = "summary.json"
+WORKERS = 2
+
+_model = None  # one per worker process, loaded by _init_worker
+
+
+def find_videos(patterns):
+    """Expand directories and glob patterns to a sorted, de-duplicated list of video files."""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern, recursive=True)
+        paths.update(os.path.abspath(p) for p in candidates
+                     if os.path.isfile(p) and p.lower().endswith(VIDEO_EXTENSIONS))
+    return sorted(paths)
+
+
+def output_names(videos):
+    """
+    Output directory name per video: its file stem, plus a short hash of its
+    absolute path when several videos share a stem (compared case-insensitively,
+    as on Windows). The hash keeps names unique and stable between re-runs.
+    """
+    stems = [os.path.splitext(os.path.basename(v))[0] for v in videos]
+    counts = {}
+    for stem in stems:
+        counts[stem.lower()] = counts.get(stem.lower(), 0) + 1
+    names = {}
+    for video, stem in zip(videos, stems):
+        if counts[stem.lower()] > 1:
+            digest = hashlib.blake2b(os.path.abspath(video).encode(), digest_size=4).hexdigest()
+            stem = f"{stem}_{digest}"
+        names[video] = stem
+    return names
+
+
+def _write_json(path, data):
+    """Write via a temporary file and rename, so a marker is never left half written."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _init_worker(model_path, threads):
+    global _model
+    import cv2
+    import torch
+    from ultralytics import YOLO
+
+    # Split the cores between workers instead of letting each one claim all of them
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(threads)
+    _model = YOLO(model_path)
+
+
+def _process_video(video_path, output_dir, options):
+    """Worker task: run one video and write its done marker; returns the marker's contents."""
+    start = time.perf_counter()
+    frame_count = run_stream(video_path, _model, output_dir, conf=options["conf"], render=options["render"],
+                             roi_crop=options["roi_crop"], crop_band=options["crop_band"],
+                             fitter=TrajectoryFitter() if options["fitter"] == "rls" else None)
+    elapsed = time.perf_counter() - start
+
+    store = ConeStore(os.path.join(output_dir, "cone_data", "cones"))
+    coeffs = np.load(os.path.join(output_dir, "trajectory.npz"))["coeffs"]
+    stats = {
+        "video": video_path,
+        "output": output_dir,
+        "frames": frame_count,
+        "fitted_frames": int((~np.isnan(coeffs).any(axis=1)).sum()),
+        "cones": int(store.offsets[-1]),
+        "seconds": round(elapsed, 2),
+        "fps": round(frame_count / elapsed, 2) if elapsed > 0 else None,
+        "options": options,
+    }
+    _write_json(os.path.join(output_dir, DONE_MARKER), stats)
+    return stats
+
+
+def write_summary(output_root, names, failed):
+    """Merge the done markers of all videos into <output_root>/summary.json."""
+    done = []
+    for video, name in names.items():
+        marker = os.path.join(output_root, name, DONE_MARKER)
+        if os.path.exists(marker):
+            with open(marker, "r") as f:
+                done.append(json.load(f))
+
+    frames = sum(d["frames"] for d in done)
+    seconds = sum(d["seconds"] for d in done)
+    summary = {
+        "videos": len(names),
+        "done": len(done),
+        "failed": failed,
+        "frames": frames,
+        "fitted_frames": sum(d["fitted_frames"] for d in done),
+        "cones": sum(d["cones"] for d in done),
+        "worker_seconds": round(seconds, 2),
+        "per_video": done,
+    }
+    _write_json(os.path.join(output_root, SUMMARY_FILE), summary)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the streaming pipeline over many videos in parallel.")
+    parser.add_argument("--videos", nargs="+", default=[VIDEO_DIR],
+                        help="video files, directories or glob patterns (quote globs)")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=OUTPUT_DIR)
+    parser.add_argument("--conf", type=float, default=CONF_THRESHOLD)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="worker processes, one model each")
+    parser.add_argument("--threads-per-worker", type=int,
+                        help="torch/OpenCV threads per worker (default: CPU count / workers)")
+    parser.add_argument("--render", action="store_true", help="write trajectory.mp4 for every video")
+    parser.add_argument("--roi-crop", action="store_true",
+                        help="run detection only on the planner ROI's bounding rectangle")
+    parser.add_argument("--crop-band", type=float, nargs=2, metavar=("TOP", "BOTTOM"),
+                        help="run detection only on this band of rows (fractions of frame height); implies --roi-crop")
+    parser.add_argument("--fitter", choices=("polyfit", "rls"), default="polyfit")
+    parser.add_argument("--force", action="store_true", help="reprocess videos that are already done")
+    args = parser.parse_args()
+
+    videos = find_videos(args.videos)
+    if not videos:
+        print(f"[WARNING] No videos found in: {' '.join(args.videos)}")
+        return
+    names = output_names(videos)
+
+    pending = [v for v in videos
+               if args.force or not os.path.exists(os.path.join(args.output, names[v], DONE_MARKER))]
+    print(f"[INFO] {len(videos)} videos found, {len(videos) - len(pending)} already done, {len(pending)} to process")
+
+    options = {"conf": args.conf, "render": args.render, "roi_crop": args.roi_crop,
+               "crop_band": args.crop_band, "fitter": args.fitter}
+    workers = max(1, min(args.workers, len(pending)))
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    # Longest videos first, so one long recording does not end up running alone at the end
+    pending.sort(key=os.path.getsize, reverse=True)
+
+    failed = {}
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(args.model, threads)) as pool:
+            futures = {}
+            for video in pending:
+                output_dir = os.path.join(args.output, names[video])
+                os.makedirs(output_dir, exist_ok=True)
+                marker = os.path.join(output_dir, DONE_MARKER)
+                if os.path.exists(marker):  # --force: stale marker goes before the outputs are rewritten
+                    os.remove(marker)
+                futures[pool.submit(_process_video, video, output_dir, options)] = video
+
+            for i, future in enumerate(as_completed(futures), 1):
+                video = futures[future]
+                try:
+                    stats = future.result()
+                    print(f"[INFO] ✅ [{i}/{len(pending)}] {names[video]}: {stats['frames']} frames, "
+                          f"{stats['fps']} FPS")
+                except Exception as e:
+                    failed[video] = f"{type(e).__name__}: {e}"
+                    print(f"[WARNING] [{i}/{len(pending)}] {names[video]} failed: {failed[video]}")
+
+    summary = write_summary(args.output, names, failed)
+    print(f"[INFO] ✅ {summary['done']}/{summary['videos']} videos done ({summary['frames']} frames), "
+          f"{len(failed)} failed; summary saved to {os.path.join(args.output, SUMMARY_FILE)}")
+
+
+if __name__ == "__main__":
+    main()
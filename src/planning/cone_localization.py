@@ -1,52 +1,130 @@
 # cone_localization.py
 
+import argparse
 import cv2
 import numpy as np
 import os
+import torch
 from ultralytics import YOLO
 
+from src.planning.cone_store import ConeStoreWriter
+from src.planning.cone_tracker import ConeTracker
+from src.planning.latency import StageTimer
+from src.planning.track_utils import (
+    LEFT_CLASS, boxes_to_cones, crop_for_detection, offset_boxes, select_track_boxes
+)
+
 # === CONFIG ===
 MODEL_PATH = "runs/train/exp/weights/best.pt"  # adjust if needed
 INPUT_DIR = "outputs/video_frames"
 OUTPUT_DIR = "outputs/frames_with_cones"
-NPZ_OUTPUT = "outputs/cone_data/cone_coords.npz"
+STORE_DIR = "outputs/cone_data/cones"  # columnar cone store, see cone_store.py
 CONF_THRESHOLD = 0.25
+BATCH_SIZE = 16  # frames per model call
+DETECT_STRIDE = 1  # run YOLO every Nth frame; the tracker predicts cones in between
+
+
+def detect_batch(model, images, conf=CONF_THRESHOLD):
+    """
+    Run the model on a list of frames in one call and return one
+    [x1, y1, x2, y2, conf, cls] array per frame.
+
+    All boxes are moved to the host with a single tensor -> NumPy transfer.
+    """
+    results = model(images, conf=conf, verbose=False)
+    counts = [len(r.boxes) for r in results]
+    if sum(counts) == 0:
+        return [np.empty((0, 6), dtype=np.float32) for _ in results]
+
+    data = torch.cat([r.boxes.data for r in results]).cpu().numpy()
+    return np.split(data, np.cumsum(counts)[:-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect cones in extracted frames.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--detect-stride", type=int, default=DETECT_STRIDE,
+                        help="run the detector every Nth frame and store tracked cones in between")
+    parser.add_argument("--roi-crop", action="store_true",
+                        help="run detection only on the planner ROI's bounding rectangle")
+    parser.add_argument("--crop-band", type=float, nargs=2, metavar=("TOP", "BOTTOM"),
+                        help="run detection only on this band of rows (fractions of frame height); implies --roi-crop")
+    parser.add_argument("--append", action="store_true", help="append to an existing cone store")
+    parser.add_argument("--profile", action="store_true", help="print per-stage p50/p95/p99 latency at the end")
+    parser.add_argument("--profile-json", help="also write the latency summary to this JSON file")
+    args = parser.parse_args()
+    if args.detect_stride < 1:
+        parser.error("--detect-stride must be at least 1")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    timer = StageTimer(enabled=args.profile or bool(args.profile_json))
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-os.makedirs(os.path.dirname(NPZ_OUTPUT), exist_ok=True)
+    # === LOAD MODEL ===
+    model = YOLO(MODEL_PATH)
+    print(f"[INFO] ✅ Model loaded from {MODEL_PATH}")
 
-# === LOAD MODEL ===
-model = YOLO(MODEL_PATH)
-print(f"[INFO] ✅ Model loaded from {MODEL_PATH}")
+    store = ConeStoreWriter(STORE_DIR, append=args.append)
+    tracker = ConeTracker() if args.detect_stride > 1 else None
+    roi_crop = args.roi_crop or args.crop_band is not None
+    frame_index = 0  # readable frames so far, for the detection stride
 
-cone_data = {}
+    # === PROCESS FRAMES ===
+    frame_files = sorted(f for f in os.listdir(INPUT_DIR) if f.endswith(".jpg"))
+    timer.start()
+    for start in range(0, len(frame_files), args.batch_size):
+        names, images = [], []
+        for fname in frame_files[start:start + args.batch_size]:
+            with timer.stage("decode"):
+                image = cv2.imread(os.path.join(INPUT_DIR, fname))
+            if image is None:
+                print(f"[WARNING] Could not read frame: {fname}")
+                timer.frame_dropped()
+                continue
+            names.append(fname)
+            images.append(image)
+        if not images:
+            continue
 
-# === PROCESS FRAMES ===
-frame_files = sorted(f for f in os.listdir(INPUT_DIR) if f.endswith(".jpg"))
-for fname in frame_files:
-    path = os.path.join(INPUT_DIR, fname)
-    image = cv2.imread(path)
-    detections = model(image, conf=CONF_THRESHOLD)[0]
+        # Only every detect_stride-th frame goes to the model; the rest are tracked
+        detect_idx = [i for i in range(len(images)) if (frame_index + i) % args.detect_stride == 0]
+        frame_index += len(images)
+        batch_boxes = [None] * len(images)
+        if detect_idx:
+            # Batch latency is recorded once per batch
+            with timer.stage("infer_batch"):
+                if roi_crop:
+                    crops, offsets = zip(*(crop_for_detection(images[i], args.crop_band) for i in detect_idx))
+                    detected = [offset_boxes(b, o) for b, o in zip(detect_batch(model, list(crops)), offsets)]
+                else:
+                    detected = detect_batch(model, [images[i] for i in detect_idx])
+                for i, boxes in zip(detect_idx, detected):
+                    batch_boxes[i] = boxes
 
-    frame_cones = []
+        for fname, image, boxes in zip(names, images, batch_boxes):
+            if tracker is not None:
+                with timer.stage("track"):
+                    boxes = tracker.step(boxes, image.shape)
+            with timer.stage("postprocess"):
+                # Only keep blue (0) and yellow (4) cones
+                boxes = select_track_boxes(boxes)
+                frame_cones = boxes_to_cones(boxes)
+                for cls_id, cx, cy in frame_cones:
+                    color = (255, 0, 0) if cls_id == LEFT_CLASS else (0, 255, 255)  # blue or yellow
+                    cv2.circle(image, (int(cx), int(cy)), 6, color, -1)
 
-    for box in detections.boxes:
-        cls_id = int(box.cls[0].item())
-        conf = float(box.conf[0].item())
-        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
-        cx, cy = int((x1 + x2) / 2), int((y1 + y2) / 2)
+            with timer.stage("store"):
+                store.append(fname, boxes, frame_shape=image.shape[:2])
+            with timer.stage("write"):
+                cv2.imwrite(os.path.join(OUTPUT_DIR, fname), image)
+            timer.frame_done()
 
-        # Only keep blue (0) and yellow (4) cones
-        if cls_id in [0, 4]:
-            frame_cones.append([cls_id, cx, cy])
-            color = (255, 0, 0) if cls_id == 0 else (0, 255, 255)  # blue or yellow
-            cv2.circle(image, (cx, cy), 6, color, -1)
+            print(f"[{fname}] Saved {len(frame_cones)} cones")
 
-    cone_data[fname] = np.array(frame_cones)
-    cv2.imwrite(os.path.join(OUTPUT_DIR, fname), image)
+    # === SAVE RESULTS ===
+    store.close()
+    print(f"[INFO] ✅ Cone coordinates saved to {STORE_DIR}")
+    timer.report(args.profile_json)
 
-    print(f"[{fname}] Saved {len(frame_cones)} cones")
 
-# === SAVE RESULTS ===
-np.savez_compressed(NPZ_OUTPUT, **cone_data)
-print(f"[INFO] ✅ Cone coordinates saved to {NPZ_OUTPUT}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# cone_store.py
+"""
+Columnar, memory-mappable store for per-frame cone detections.
+
+A store is a directory holding one raw binary file per column plus a
+per-frame offsets index:
+
+    cones/
+    ├── frame_idx.bin  cls.bin  cx.bin  cy.bin  px.bin  py.bin  conf.bin  w.bin  h.bin
+    ├── offsets.bin    # int64 end row of each frame
+    ├── frames.txt     # one frame name per line
+    └── meta.json      # frame shape and column dtypes
+
+Rows of frame i are offsets[i-1]:offsets[i]. Columns are only ever appended,
+so a store can be read (memory-mapped) while it is still being recorded.
+
+cx/cy are the sub-pixel box centres; px/py are the integer pixel centres
+exactly as boxes_to_cones computes them, which is what the planners consume.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from src.planning.track_utils import boxes_to_cones
+
+COLUMNS = {
+    "frame_idx": np.int32,
+    "cls": np.int16,
+    "cx": np.float32,
+    "cy": np.float32,
+    "px": np.int32,
+    "py": np.int32,
+    "conf": np.float32,
+    "w": np.float32,
+    "h": np.float32,
+}
+
+
+def _check_columns(meta, path):
+    missing = sorted(set(COLUMNS) - set(meta.get("columns", {})))
+    if missing:
+        raise ValueError(f"Cone store {path} has no {', '.join(missing)} column(s); record it again")
+
+
+class ConeStoreWriter:
+    """Append per-frame detections to a cone store directory."""
+
+    def __init__(self, path, frame_shape=None, append=False):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+        meta_path = os.path.join(path, "meta.json")
+        if append and os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            _check_columns(meta, path)
+            frame_shape = frame_shape or meta.get("frame_shape")
+            self._recover()
+            mode = "ab"
+        else:
+            self.num_frames = 0
+            self.num_rows = 0
+            mode = "wb"
+
+        self.frame_shape = frame_shape
+        self._files = {name: open(os.path.join(path, f"{name}.bin"), mode) for name in COLUMNS}
+        self._offsets = open(os.path.join(path, "offsets.bin"), mode)
+        self._names = open(os.path.join(path, "frames.txt"), "w" if mode == "wb" else "a")
+        self._write_meta()
+
+    def _recover(self):
+        """Drop any partially written frame left behind by an interrupted recording."""
+        offsets = np.fromfile(os.path.join(self.path, "offsets.bin"), dtype=np.int64)
+        with open(os.path.join(self.path, "frames.txt"), "r") as f:
+            names = f.read().splitlines()
+
+        self.num_frames = min(len(offsets), len(names))
+        self.num_rows = int(offsets[self.num_frames - 1]) if self.num_frames else 0
+
+        offsets[:self.num_frames].tofile(os.path.join(self.path, "offsets.bin"))
+        with open(os.path.join(self.path, "frames.txt"), "w") as f:
+            f.writelines(name + "\n" for name in names[:self.num_frames])
+        for name, dtype in COLUMNS.items():
+            os.truncate(os.path.join(self.path, f"{name}.bin"), self.num_rows * np.dtype(dtype).itemsize)
+
+    def _write_meta(self):
+        meta = {
+            "frame_shape": list(self.frame_shape) if self.frame_shape is not None else None,
+            "columns": {name: np.dtype(dtype).str for name, dtype in COLUMNS.items()},
+        }
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+    def append(self, name, boxes, frame_shape=None):
+        """
+        Append one frame.
+
+        boxes: YOLO rows [x1, y1, x2, y2, conf, cls] (already filtered by the caller).
+        """
+        if frame_shape is not None and self.frame_shape is None:
+            self.frame_shape = tuple(frame_shape)
+            self._write_meta()
+
+        boxes = np.asarray(boxes).reshape(-1, 6)
+        # Integer centres from the boxes as given, before the float32 cast below
+        pixels = boxes_to_cones(boxes, classes=None)
+        boxes = boxes.astype(np.float32)
+        columns = {
+            "frame_idx": np.full(len(boxes), self.num_frames),
+            "cls": boxes[:, 5],
+            "cx": (boxes[:, 0] + boxes[:, 2]) / 2,
+            "cy": (boxes[:, 1] + boxes[:, 3]) / 2,
+            "px": pixels[:, 1],
+            "py": pixels[:, 2],
+            "conf": boxes[:, 4],
+            "w": boxes[:, 2] - boxes[:, 0],
+            "h": boxes[:, 3] - boxes[:, 1],
+        }
+        # Columns first, then the index, so a concurrent reader never sees a frame without its rows
+        for col, dtype in COLUMNS.items():
+            self._files[col].write(columns[col].astype(dtype).tobytes())
+            self._files[col].flush()
+
+        self.num_rows += len(boxes)
+        self.num_frames += 1
+        self._offsets.write(np.int64(self.num_rows).tobytes())
+        self._offsets.flush()
+        self._names.write(name + "\n")
+        self._names.flush()
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._offsets.close()
+        self._names.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConeStore:
+    """Read-only, memory-mapped view of a cone store directory."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            meta = json.load(f)
+        _check_columns(meta, path)
+        self.frame_shape = tuple(meta["frame_shape"]) if meta.get("frame_shape") else None
+
+        with open(os.path.join(path, "frames.txt"), "r") as f:
+            names = f.read().splitlines()
+        offsets = self._map("offsets", np.int64)
+
+        # A store that is still being written may have one more entry in either file
+        num_frames = min(len(names), len(offsets))
+        self.names = names[:num_frames]
+        self.offsets = np.concatenate([[0], offsets[:num_frames]])
+
+        num_rows = int(self.offsets[-1])
+        self.columns = {name: self._map(name, dtype)[:num_rows] for name, dtype in COLUMNS.items()}
+
+    def _map(self, name, dtype):
+        file_path = os.path.join(self.path, f"{name}.bin")
+        count = os.path.getsize(file_path) // np.dtype(dtype).itemsize
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode="r", shape=(count,))
+
+    def __len__(self):
+        return len(self.names)
+
+    def frame_range(self, start, stop):
+        """Zero-copy column views covering frames [start, stop)."""
+        lo, hi = self.offsets[start], self.offsets[stop]
+        return {name: col[lo:hi] for name, col in self.columns.items()}
+
+    def frame(self, i):
+        """Zero-copy column views for frame i."""
+        return self.frame_range(i, i + 1)
+
+    def cones_range(self, start, stop):
+        """Frames [start, stop) as one (N, 3) int array of [cls, cx, cy]; split it with offsets."""
+        cols = self.frame_range(start, stop)
+        return np.stack([cols["cls"], cols["px"], cols["py"]], axis=1).astype(int)
+
+    def cones(self, i):
+        """
+        Frame i as an (N, 3) int array of [cls, cx, cy], the layout the planners use.
+
+        These are the centres boxes_to_cones gave for the recorded boxes, so
+        offline planning sees the same cones as the real-time path.
+        """
+        return self.cones_range(i, i + 1)
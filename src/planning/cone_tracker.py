@@ -0,0 +1,144 @@
+# cone_tracker.py
+"""
+Constant-velocity cone tracker, so YOLO only has to run every Nth frame.
+
+Tracks are kept per class and work on the same [x1, y1, x2, y2, conf, cls]
+rows the detector returns:
+
+    tracker = ConeTracker()
+    boxes = tracker.step(detector_boxes)  # detection frame: predict, then correct with detections
+    boxes = tracker.step()                # frame in between: prediction only
+
+Each step first moves every track by its per-frame velocity. Detections are
+then assigned to the predicted tracks of their class, greedily by centre
+distance within gate_px per frame since the track was last corrected, and matched tracks are corrected with an alpha-beta
+update. Unmatched detections start new tracks; tracks that go unmatched on
+more than max_missed detection frames, or leave the frame, are dropped.
+"""
+
+import numpy as np
+
+from src.planning.track_utils import LEFT_CLASS, RIGHT_CLASS
+
+GATE_PX = 25.0  # max centre distance between a predicted track and its detection, per frame of stride
+ALPHA = 0.85  # position correction gain (1 = snap to the detection)
+BETA = 0.3  # velocity correction gain
+MAX_MISSED = 2  # detection frames a track may go unmatched before it is dropped
+
+
+def _greedy_assign(cost, gate):
+    """One-to-one (row, col) pairs with cost < gate, taken from the smallest cost up."""
+    rows, cols = np.nonzero(cost < gate)
+    order = np.argsort(cost[rows, cols], kind="stable")
+    row_used = np.zeros(cost.shape[0], dtype=bool)
+    col_used = np.zeros(cost.shape[1], dtype=bool)
+    pairs = []
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if not row_used[r] and not col_used[c]:
+            row_used[r] = col_used[c] = True
+            pairs.append((r, c))
+    return np.array(pairs, dtype=int).reshape(-1, 2)
+
+
+class ConeTracker:
+    """Carries cone boxes across frames with constant-velocity prediction and gated assignment."""
+
+    def __init__(self, classes=(LEFT_CLASS, RIGHT_CLASS), gate_px=GATE_PX, alpha=ALPHA, beta=BETA,
+                 max_missed=MAX_MISSED):
+        self.classes = classes
+        self.gate_px = gate_px
+        self.alpha = alpha
+        self.beta = beta
+        self.max_missed = max_missed
+
+        # One row per track
+        self.center = np.empty((0, 2))
+        self.velocity = np.empty((0, 2))  # px per frame
+        self.size = np.empty((0, 2))  # box w, h
+        self.conf = np.empty(0)
+        self.cls = np.empty(0, dtype=int)
+        self.missed = np.empty(0, dtype=int)
+        self.since_update = np.empty(0, dtype=int)  # frames since the last matched detection
+
+    def __len__(self):
+        return len(self.cls)
+
+    def reset(self):
+        self.__init__(self.classes, self.gate_px, self.alpha, self.beta, self.max_missed)
+
+    def _keep(self, mask):
+        for name in ("center", "velocity", "size", "conf", "cls", "missed", "since_update"):
+            setattr(self, name, getattr(self, name)[mask])
+
+    def _predict(self, frame_shape):
+        self.center = self.center + self.velocity
+        self.since_update += 1
+        if frame_shape is not None:
+            h, w = frame_shape[:2]
+            x, y = self.center.T
+            self._keep((x >= 0) & (x < w) & (y >= 0) & (y < h))
+
+    def _update(self, boxes):
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 6)
+        boxes = boxes[np.isin(boxes[:, 5].astype(int), self.classes)]
+        det_center = (boxes[:, :2] + boxes[:, 2:4]) / 2
+        det_size = boxes[:, 2:4] - boxes[:, :2]
+        det_cls = boxes[:, 5].astype(int)
+
+        matched_tracks, matched_dets = [], []
+        for c in self.classes:
+            tracks = np.flatnonzero(self.cls == c)
+            dets = np.flatnonzero(det_cls == c)
+            if len(tracks) == 0 or len(dets) == 0:
+                continue
+            cost = np.linalg.norm(self.center[tracks, None] - det_center[None, dets], axis=2)
+            # Prediction error grows with the number of frames since the last correction
+            gate = self.gate_px * np.maximum(self.since_update[tracks], 1)[:, None]
+            pairs = _greedy_assign(cost / gate, 1.0)
+            matched_tracks.append(tracks[pairs[:, 0]])
+            matched_dets.append(dets[pairs[:, 1]])
+
+        t = np.concatenate(matched_tracks) if matched_tracks else np.empty(0, dtype=int)
+        d = np.concatenate(matched_dets) if matched_dets else np.empty(0, dtype=int)
+
+        # Alpha-beta correction of the matched tracks
+        residual = det_center[d] - self.center[t]
+        self.center[t] += self.alpha * residual
+        self.velocity[t] += self.beta * residual / np.maximum(self.since_update[t], 1)[:, None]
+        self.size[t] = det_size[d]
+        self.conf[t] = boxes[d, 4]
+        self.since_update[t] = 0
+
+        missed = np.ones(len(self), dtype=bool)
+        missed[t] = False
+        self.missed[missed] += 1
+        self.missed[t] = 0
+        self._keep(self.missed <= self.max_missed)
+
+        # Unmatched detections start new, stationary tracks
+        new = np.ones(len(boxes), dtype=bool)
+        new[d] = False
+        n = int(new.sum())
+        self.center = np.concatenate([self.center, det_center[new]])
+        self.velocity = np.concatenate([self.velocity, np.zeros((n, 2))])
+        self.size = np.concatenate([self.size, det_size[new]])
+        self.conf = np.concatenate([self.conf, boxes[new, 4]])
+        self.cls = np.concatenate([self.cls, det_cls[new]])
+        self.missed = np.concatenate([self.missed, np.zeros(n, dtype=int)])
+        self.since_update = np.concatenate([self.since_update, np.zeros(n, dtype=int)])
+
+    def boxes(self):
+        """Current tracks as (N, 6) float32 rows of [x1, y1, x2, y2, conf, cls]."""
+        half = self.size / 2
+        return np.column_stack([self.center - half, self.center + half, self.conf, self.cls]).astype(np.float32)
+
+    def step(self, boxes=None, frame_shape=None):
+        """
+        Advance one frame. Pass the detector's boxes on detection frames and
+        None in between; frame_shape (h, w) drops tracks that leave the frame.
+        Returns the tracked boxes for this frame.
+        """
+        self._predict(frame_shape)
+        if boxes is not None:
+            self._update(boxes)
+        return self.boxes()
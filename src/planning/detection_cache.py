@@ -0,0 +1,134 @@
+# detection_cache.py
+"""
+Persistent cache of detector output, so re-running a planner with different
+planning parameters does not re-run YOLO on frames it has already seen.
+
+Entries are keyed by a BLAKE2b hash of
+    (frame pixels and shape, model weights file, conf threshold, imgsz, variant)
+where variant covers anything else that changes the boxes (e.g. ROI cropping).
+Any change to the frame, the weights or the detector settings is therefore a
+miss, never a stale hit. Boxes are stored as float32 [x1, y1, x2, y2, conf, cls]
+blobs in a single SQLite file. When the file grows past max_bytes, the least
+recently used entries are evicted.
+
+    cache = DetectionCache("outputs/detection_cache", MODEL_PATH)
+    boxes = cache.get(frame, conf, imgsz)
+    if boxes is None:
+        boxes = run_model(frame)
+        cache.put(frame, conf, imgsz, boxes)
+    cache.close()
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+MAX_BYTES = 512 * 1024 * 1024
+EVICT_TO = 0.9  # after eviction the cache holds at most this fraction of max_bytes
+COMMIT_EVERY = 200  # cache writes (puts and LRU touches) per SQLite commit
+_CHUNK = 1 << 20
+
+
+@lru_cache(maxsize=8)
+def _file_digest(path, mtime_ns, size):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def model_digest(path):
+    """Hash of a weights file; recomputed only when its mtime or size changes."""
+    st = os.stat(path)
+    return _file_digest(os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def frame_key(frame, model_hash, conf, imgsz=None, variant=""):
+    """Cache key for one frame and detector configuration."""
+    frame = np.ascontiguousarray(frame)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(frame.data)  # hashed in place, no copy
+    h.update(f"|{frame.shape}|{frame.dtype}|{model_hash}|{conf}|{imgsz}|{variant}".encode())
+    return h.hexdigest()
+
+
+class DetectionCache:
+    """Size-bounded LRU cache of per-frame detections in <cache_dir>/detections.sqlite."""
+
+    def __init__(self, cache_dir, model_path, max_bytes=MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.model_hash = model_digest(model_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        # The threaded planner calls detect() from its inference thread
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, "detections.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries "
+                         "(key TEXT PRIMARY KEY, boxes BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self.total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _wrote(self):
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self._db.commit()
+            self._pending = 0
+
+    def get(self, frame, conf, imgsz=None, variant=""):
+        """Cached (N, 6) float32 boxes for this frame and configuration, or None on a miss."""
+        key = frame_key(frame, self.model_hash, conf, imgsz, variant)
+        with self._lock:
+            row = self._db.execute("SELECT boxes FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._wrote()
+            self.hits += 1
+        return np.frombuffer(row[0], dtype=np.float32).reshape(-1, 6)
+
+    def put(self, frame, conf, imgsz, boxes, variant=""):
+        key = frame_key(frame, self.model_hash, conf, imgsz, variant)
+        blob = np.asarray(boxes, dtype=np.float32).reshape(-1, 6).tobytes()
+        size = len(blob) + len(key)
+        with self._lock:
+            old = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (key, blob, size, time.time()))
+            self.total_bytes += size - (old[0] if old else 0)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self._wrote()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is at EVICT_TO of max_bytes."""
+        target = self.total_bytes - int(self.max_bytes * EVICT_TO)
+        freed, cutoff = 0, None
+        for size, last_used in self._db.execute("SELECT size, last_used FROM entries ORDER BY last_used"):
+            freed += size
+            cutoff = last_used
+            if freed >= target:
+                break
+        if cutoff is not None:
+            self._db.execute("DELETE FROM entries WHERE last_used <= ?", (cutoff,))
+            self.total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def report(self):
+        lookups = self.hits + self.misses
+        rate = 100.0 * self.hits / lookups if lookups else 0.0
+        print(f"[CACHE] {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), "
+              f"{self.total_bytes / 1e6:.1f} MB on disk")
@@ -0,0 +1,202 @@
+# frame_scheduler.py
+"""
+Deadline-aware scheduling for live planning.
+
+LatestFrameGrabber reads frames on a background thread and keeps only the
+newest one: when the planner falls behind, frames it never got to are dropped
+instead of queueing up (latest-frame-wins), so latency cannot grow without
+bound.
+
+DeadlineScheduler then gives each frame a budget of deadline_ms from the moment
+it was grabbed. Using running estimates of inference and planning time it
+either runs detection at full resolution, degrades to a smaller inference size,
+or skips detection. A skipped frame still goes through detect(..., skip=True),
+which must not run the model: it returns predicted detections (e.g. from a
+cone tracker) or none at all, which makes the planner fall back to its
+previous midpoints.
+
+    grabber = LatestFrameGrabber(file_source(paths), fps=30)
+    scheduler = DeadlineScheduler(deadline_ms=33, degrade_imgsz=320)
+    scheduler.run(grabber, detect, plan, write)
+"""
+
+import itertools
+import os
+import threading
+import time
+
+import cv2
+
+from src.planning.latency import StageTimer
+
+DEADLINE_MS = 33.0  # one frame at 30 FPS
+MAX_CONSECUTIVE_SKIPS = 2  # detection is forced after this many skipped frames
+PROBE_EVERY = 30  # frames between full-resolution runs while degraded, to notice when it fits again
+EMA_WEIGHT = 0.2  # weight of the newest sample in the latency estimates
+
+
+def file_source(paths):
+    """read_next() for a list of image files; yields (name, frame), then None at the end."""
+    paths = iter(paths)
+
+    def read_next():
+        for path in paths:
+            return os.path.basename(path), cv2.imread(path)
+        return None
+    return read_next
+
+
+def capture_source(cap):
+    """read_next() for an opened cv2.VideoCapture (video file or camera)."""
+    counter = itertools.count()
+
+    def read_next():
+        ok, frame = cap.read()
+        if not ok:
+            cap.release()
+            return None
+        return f"frame_{next(counter):05d}.jpg", frame
+    return read_next
+
+
+class LatestFrameGrabber:
+    """
+    Pulls frames from read_next() on a background thread, optionally paced at
+    `fps` to stand in for a camera, and keeps only the newest unconsumed frame.
+    """
+
+    def __init__(self, read_next, fps=None, timer=None):
+        self.read_next = read_next
+        self.period = 1.0 / fps if fps else None
+        self.timer = timer or StageTimer(enabled=False)
+        self.grabbed = 0
+        self.dropped = 0
+        self._slot = None  # (name, frame, grab time)
+        self._done = False
+        self._error = None
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="grab", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        next_tick = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                item = self.read_next()
+                if item is None:
+                    break
+                name, frame = item
+                if frame is None:
+                    print(f"[WARNING] Could not read frame: {name}")
+                    self.timer.frame_dropped()
+                    continue
+
+                with self._cond:
+                    if self._slot is not None:  # the planner never got to the previous frame
+                        self.dropped += 1
+                        self.timer.frame_dropped()
+                    self._slot = (name, frame, time.perf_counter())
+                    self.grabbed += 1
+                    self._cond.notify()
+
+                if self.period:
+                    next_tick += self.period
+                    time.sleep(max(0.0, next_tick - time.perf_counter()))
+        except Exception as e:  # surfaced from latest()
+            self._error = e
+        finally:
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def latest(self):
+        """Block until a frame is available and return (name, frame, grab time), or None at the end."""
+        with self._cond:
+            while self._slot is None and not self._done:
+                self._cond.wait()
+            if self._error is not None:
+                raise self._error
+            item, self._slot = self._slot, None
+            return item
+
+
+class DeadlineScheduler:
+    """
+    detect(frame, imgsz, skip=False) -> detections   (imgsz None means the model's default;
+        skip=True on frames without detection, see the module docstring)
+    plan(name, frame, detections) -> output
+    write(name, output)
+    """
+
+    def __init__(self, deadline_ms=DEADLINE_MS, degrade_imgsz=None):
+        self.deadline = deadline_ms / 1000.0
+        self.degrade_imgsz = degrade_imgsz
+        # Running latency estimates in seconds; None until first measured
+        self.estimates = {"full": None, "degraded": None, "rest": None}
+        self.stats = {"planned": 0, "degraded": 0, "skipped": 0, "over_deadline": 0}
+
+    def _update(self, key, seconds):
+        old = self.estimates[key]
+        self.estimates[key] = seconds if old is None else (1 - EMA_WEIGHT) * old + EMA_WEIGHT * seconds
+
+    def _fits(self, key, budget):
+        infer, rest = self.estimates[key], self.estimates["rest"] or 0.0
+        return infer is None or infer + rest <= budget
+
+    def choose(self, budget, skipped_in_a_row, since_full):
+        """'full', 'degraded' or 'skip' for a frame with `budget` seconds left."""
+        if self._fits("full", budget) or since_full >= PROBE_EVERY:
+            return "full"
+        if self.degrade_imgsz and self._fits("degraded", budget):
+            return "degraded"
+        if skipped_in_a_row >= MAX_CONSECUTIVE_SKIPS:
+            # Never go without detections for long; refresh at the cheapest size available
+            return "degraded" if self.degrade_imgsz else "full"
+        return "skip"
+
+    def run(self, grabber, detect, plan, write):
+        """Plan on the newest frame until the grabber runs dry; returns the stats dict."""
+        skipped_in_a_row = since_full = 0
+        grabber.start()
+        try:
+            while (item := grabber.latest()) is not None:
+                name, frame, grabbed_at = item
+                start = time.perf_counter()
+                mode = self.choose(self.deadline - (start - grabbed_at), skipped_in_a_row, since_full)
+                since_full = 0 if mode == "full" else since_full + 1
+
+                if mode == "skip":
+                    detections = detect(frame, None, skip=True)
+                    self.stats["skipped"] += 1
+                    skipped_in_a_row += 1
+                else:
+                    detections = detect(frame, self.degrade_imgsz if mode == "degraded" else None)
+                    self._update(mode, time.perf_counter() - start)
+                    if mode == "degraded":
+                        self.stats["degraded"] += 1
+                    skipped_in_a_row = 0
+
+                rest_start = time.perf_counter()
+                write(name, plan(name, frame, detections))
+                done = time.perf_counter()
+                self._update("rest", done - rest_start)
+
+                self.stats["planned"] += 1
+                if done - grabbed_at > self.deadline:
+                    self.stats["over_deadline"] += 1
+        finally:
+            grabber.stop()
+
+        self.stats["dropped"] = grabber.dropped
+        s = self.stats
+        print(f"[SCHED] {s['planned']} frames planned, {s['dropped']} dropped (stale), {s['degraded']} degraded, "
+              f"{s['skipped']} without detection, {s['over_deadline']} over the {self.deadline * 1000:.0f} ms deadline")
+        return self.stats
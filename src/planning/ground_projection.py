@@ -0,0 +1,116 @@
+# ground_projection.py
+"""
+Inverse-perspective mapping of cone pixels onto the ground plane.
+
+With a calibrated pinhole camera at a known height and pitch, every pixel below
+the horizon corresponds to one point on a flat ground plane. That mapping is a
+3x3 homography, built once per camera and frame resolution and cached, so whole
+arrays of cone centres are converted to metric (x, z) with one matrix product.
+Only points are mapped; frames are never warped.
+
+Ground coordinates are in metres: x to the right of the camera, z forward.
+
+    ground = pixels_to_ground(cones[:, 1:], h, w)
+    midpoints = metric_midpoints(left_cones, right_cones, h, w)  # pairing in metres
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from src.config import (
+    CAMERA_CX, CAMERA_CY, CAMERA_FX, CAMERA_FY, CAMERA_HEIGHT_M, CAMERA_PITCH_DEG, CAMERA_RESOLUTION
+)
+from src.planning.track_utils import match_cones
+
+# Left/right cones whose forward distances differ by less than this are paired
+PAIR_Z_THRESHOLD_M = 1.0
+MIN_Z_M = 0.5  # points closer than this (or behind/above the horizon) are treated as invalid
+
+CameraModel = namedtuple("CameraModel", "fx fy cx cy height_m pitch_deg resolution")
+DEFAULT_CAMERA = CameraModel(CAMERA_FX, CAMERA_FY, CAMERA_CX, CAMERA_CY, CAMERA_HEIGHT_M, CAMERA_PITCH_DEG,
+                             tuple(CAMERA_RESOLUTION))
+
+
+@lru_cache(maxsize=16)
+def ground_homography(h, w, camera=DEFAULT_CAMERA):
+    """
+    (ground_to_image, image_to_ground) 3x3 homographies for an (h, w) frame.
+
+    Intrinsics are rescaled from the calibration resolution to (w, h). Built once
+    per camera and resolution; treat as read-only.
+    """
+    calib_w, calib_h = camera.resolution
+    sx, sy = w / calib_w, h / calib_h
+    K = np.array([[camera.fx * sx, 0.0, camera.cx * sx],
+                  [0.0, camera.fy * sy, camera.cy * sy],
+                  [0.0, 0.0, 1.0]])
+
+    # Camera axes: x right, y down, z forward; pitched down by pitch_deg about x
+    pitch = np.radians(camera.pitch_deg)
+    R = np.array([[1.0, 0.0, 0.0],
+                  [0.0, np.cos(pitch), -np.sin(pitch)],
+                  [0.0, np.sin(pitch), np.cos(pitch)]])
+    # Ground point (x, height, z) in level-camera axes -> pixel; linear in (x, z, 1)
+    ground_to_image = K @ np.column_stack([R[:, 0], R[:, 2], camera.height_m * R[:, 1]])
+    image_to_ground = np.linalg.inv(ground_to_image)
+
+    ground_to_image.setflags(write=False)
+    image_to_ground.setflags(write=False)
+    return ground_to_image, image_to_ground
+
+
+def _apply(H, points):
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    projected = points @ H[:, :2].T + H[:, 2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return projected[:, :2] / projected[:, 2:]
+
+
+def pixels_to_ground(points, h, w, camera=DEFAULT_CAMERA):
+    """
+    Map (N, 2) pixel [u, v] points of an (h, w) frame to (N, 2) ground [x, z] in
+    metres. Points on or above the horizon, or closer than MIN_Z_M, come out as NaN.
+    """
+    ground = _apply(ground_homography(h, w, camera)[1], points)
+    ground[~(np.isfinite(ground).all(axis=1) & (ground[:, 1] >= MIN_Z_M))] = np.nan
+    return ground
+
+
+def ground_to_pixels(points, h, w, camera=DEFAULT_CAMERA):
+    """Map (N, 2) ground [x, z] points in metres back to (N, 2) float pixel [u, v] points."""
+    return _apply(ground_homography(h, w, camera)[0], points)
+
+
+def metric_midpoints(left_cones, right_cones, h, w, z_threshold=PAIR_Z_THRESHOLD_M, camera=DEFAULT_CAMERA):
+    """
+    Pair left and right cone pixel centres by forward distance on the ground and
+    return the (N, 2) float midpoints [x, z] in metres, ordered like the matched left cones.
+    """
+    left = pixels_to_ground(left_cones, h, w, camera)
+    right = pixels_to_ground(right_cones, h, w, camera)
+    left = left[~np.isnan(left[:, 1])]
+    right = right[~np.isnan(right[:, 1])]
+
+    match = match_cones(left[:, 1], right[:, 1], z_threshold)
+    matched = np.flatnonzero(match >= 0)
+    return (left[matched] + right[match[matched]]) / 2
+
+
+def fit_centerline_metric(midpoints, num_points=100):
+    """
+    Fit x = f(z) as a quadratic through (N, 2) metric [x, z] midpoints.
+
+    Returns (coeffs, centerline) with the centerline as an (num_points, 2) float
+    array of [x, z] over the midpoints' z range, or (None, None) for fewer than 3 midpoints.
+    """
+    midpoints = np.asarray(midpoints, dtype=float).reshape(-1, 2)
+    midpoints = midpoints[~np.isnan(midpoints).any(axis=1)]
+    if len(midpoints) < 3:
+        return None, None
+
+    x, z = midpoints[:, 0], midpoints[:, 1]
+    coeffs = np.polyfit(z, x, deg=2)
+    z_fit = np.linspace(z.min(), z.max(), num_points)
+    return coeffs, np.column_stack([np.polyval(coeffs, z_fit), z_fit])
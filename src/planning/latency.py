@@ -0,0 +1,135 @@
+# latency.py
+"""
+Lightweight per-stage latency timers.
+
+    timer = StageTimer(enabled=True)
+    with timer.stage("infer"):
+        ...
+    timer.frame_done()
+    timer.report("latency.json")
+
+Samples go into fixed-size log-spaced histograms (1 µs .. 10 s), so memory
+stays constant however long the run is and percentiles are accurate to a few
+percent. A disabled timer hands out one shared no-op context manager, so the
+instrumentation can stay in the hot loop.
+"""
+
+import json
+import math
+import threading
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+MIN_SECONDS = 1e-6
+MAX_SECONDS = 10.0
+NUM_BINS = 256
+
+_NOOP = nullcontext()
+
+
+class _Span:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.record(self.name, time.perf_counter() - self.start)
+
+
+class StageTimer:
+    """Collects per-stage latency histograms plus frame and drop counts."""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {}
+        self.frames = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._log_min = math.log(MIN_SECONDS)
+        self._log_step = (math.log(MAX_SECONDS) - self._log_min) / NUM_BINS
+        self._start = None
+        self._end = None
+
+    def stage(self, name):
+        """Context manager timing one execution of stage `name`."""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name)
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        idx = int((math.log(max(seconds, MIN_SECONDS)) - self._log_min) / self._log_step)
+        idx = min(idx, NUM_BINS - 1)
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = np.zeros(NUM_BINS, dtype=np.int64)
+            hist[idx] += 1
+
+    def frame_done(self):
+        """Mark one frame as fully processed (used for end-to-end FPS)."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            if self._start is None:
+                self._start = now
+            self._end = now
+            self.frames += 1
+
+    def frame_dropped(self):
+        if self.enabled:
+            with self._lock:
+                self.dropped += 1
+
+    def start(self):
+        """Start the wall clock explicitly (otherwise it starts at the first finished frame)."""
+        self._start = time.perf_counter()
+
+    def _percentile(self, hist, q):
+        target = q * hist.sum()
+        idx = int(np.searchsorted(np.cumsum(hist), target))
+        # Geometric centre of the bin
+        return math.exp(self._log_min + (idx + 0.5) * self._log_step)
+
+    def summary(self):
+        stages = {}
+        for name, hist in self.histograms.items():
+            stages[name] = {
+                "count": int(hist.sum()),
+                "p50_ms": round(self._percentile(hist, 0.50) * 1000, 3),
+                "p95_ms": round(self._percentile(hist, 0.95) * 1000, 3),
+                "p99_ms": round(self._percentile(hist, 0.99) * 1000, 3),
+            }
+        elapsed = (self._end - self._start) if self._start is not None and self._end is not None else 0.0
+        return {
+            "frames": self.frames,
+            "dropped_frames": self.dropped,
+            "elapsed_s": round(elapsed, 3),
+            "fps": round(self.frames / elapsed, 2) if elapsed > 0 else None,
+            "stages": stages,
+        }
+
+    def report(self, json_path=None):
+        """Print the summary table and optionally write it as JSON."""
+        if not self.enabled:
+            return None
+        summary = self.summary()
+        print(f"[LATENCY] {summary['frames']} frames, {summary['dropped_frames']} dropped, {summary['fps']} FPS")
+        print(f"{'stage':<12}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, s in summary["stages"].items():
+            print(f"{name:<12}{s['count']:>8}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}")
+        if json_path:
+            with open(json_path, "w") as f:
+                json.dump(summary, f, indent=2)
+            print(f"[INFO] ✅ Latency summary saved to {json_path}")
+        return summary
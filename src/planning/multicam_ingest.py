@@ -0,0 +1,319 @@
+# multicam_ingest.py
+"""
+Asyncio ingestion of several cameras with timestamp synchronization.
+
+Every camera is an async source of (timestamp, frame) pairs, read on its own
+task (cv2 decoding runs in a worker thread so cameras decode concurrently).
+Each camera has a small bounded buffer. When detection falls behind, the
+oldest frame is dropped to make room for the newest one, the same
+latest-frame-wins rule as frame_scheduler.
+
+MultiCamSync groups the buffered frames into synchronized sets: one frame per
+camera, all within tolerance_ms of the newest of them. A frame too old to be
+matched with the other cameras is discarded. Each set goes to the detector as
+one batch, so all cameras share a single model call per tick. Reading
+continues while that call runs.
+
+    sources = {"left": video_source("left.mp4"), "wide": synthetic_source(phase_ms=3)}
+    ingest = MultiCamIngest(sources, tolerance_ms=20, queue_size=4)
+    asyncio.run(ingest.run(detect, handle))   # detect(images) -> boxes per image
+
+Per-camera counters (received, dropped because the buffer was full, dropped
+because they could not be synchronized, synced) and per-camera latency from
+arrival to detections come out of ingest.report().
+
+Run from the repository root:
+    python -m src.planning.multicam_ingest --camera left=Test_videos/left.mp4 --camera right=Test_videos/right.mp4
+    python -m src.planning.multicam_ingest   # three synthetic stand-in cameras
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from src.planning.latency import StageTimer
+
+# === CONFIG ===
+MODEL_PATH = "runs/train/exp/weights/best.pt"
+STORE_DIR = "outputs/cone_data/multicam"  # one cone store per camera
+CONF_THRESHOLD = 0.25
+TOLERANCE_MS = 20.0  # max timestamp spread within one synchronized set
+QUEUE_SIZE = 4  # frames buffered per camera before the oldest is dropped
+SOURCE_FPS = 30.0  # pacing for frame directories and synthetic cameras
+SYNTHETIC_JITTER_MS = 2.0
+DEFAULT_CAMERAS = ("stereo_left=synthetic", "stereo_right=synthetic", "wide=synthetic")
+
+Frame = namedtuple("Frame", "camera seq timestamp arrival image")
+
+
+# === Sources ===
+async def _paced(period, next_tick):
+    next_tick += period
+    await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+    return next_tick
+
+
+async def video_source(path, pace=True):
+    """Frames of a video file with their media timestamps, paced at the file's FPS like a live camera."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {path}")
+    period = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or SOURCE_FPS)
+    # A thread of its own: release() then always queues behind a read still in flight on cancellation
+    decoder = ThreadPoolExecutor(max_workers=1)
+    loop = asyncio.get_running_loop()
+    next_tick = time.perf_counter()
+    try:
+        while True:
+            ok, frame = await loop.run_in_executor(decoder, cap.read)
+            if not ok:
+                break
+            yield cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0, frame
+            if pace:
+                next_tick = await _paced(period, next_tick)
+    finally:
+        decoder.submit(cap.release)
+        decoder.shutdown(wait=False)
+
+
+async def frame_dir_source(path, fps=SOURCE_FPS, pace=True):
+    """JPEG frames of a directory in name order, timestamped at fps."""
+    names = sorted(f for f in os.listdir(path) if f.endswith(".jpg"))
+    next_tick = time.perf_counter()
+    for i, name in enumerate(names):
+        frame = await asyncio.to_thread(cv2.imread, os.path.join(path, name))
+        if frame is None:
+            print(f"[WARNING] Could not read frame: {name}")
+            continue
+        yield i / fps, frame
+        if pace:
+            next_tick = await _paced(1.0 / fps, next_tick)
+
+
+async def synthetic_source(fps=SOURCE_FPS, shape=(480, 640, 3), phase_ms=0.0, jitter_ms=SYNTHETIC_JITTER_MS,
+                           num_frames=None, seed=0):
+    """
+    Stand-in camera for testing without recordings: a drifting pair of cone
+    rows at fps, with timestamps offset by phase_ms and jittered by up to jitter_ms.
+    """
+    rng = np.random.default_rng(seed)
+    h, w = shape[:2]
+    background = np.full(shape, 90, dtype=np.uint8)
+    next_tick = time.perf_counter()
+    i = 0
+    while num_frames is None or i < num_frames:
+        frame = background.copy()
+        shift = int(40 * np.sin(i / fps))
+        for row in range(4):
+            y = h // 2 + row * h // 10
+            cv2.circle(frame, (w // 4 + shift, y), 8, (255, 0, 0), -1)
+            cv2.circle(frame, (3 * w // 4 + shift, y), 8, (0, 255, 255), -1)
+        yield i / fps + (phase_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000.0, frame
+        next_tick = await _paced(1.0 / fps, next_tick)
+        i += 1
+
+
+def open_source(spec, index=0, fps=SOURCE_FPS, num_frames=None):
+    """Source for a spec: a video file, a frame directory, or 'synthetic'."""
+    if spec == "synthetic":
+        # Give each stand-in camera its own trigger phase, as unsynchronized hardware would have
+        return synthetic_source(fps, phase_ms=3.0 * index, num_frames=num_frames, seed=index)
+    if os.path.isdir(spec):
+        return frame_dir_source(spec, fps)
+    return video_source(spec)
+
+
+# === Synchronization ===
+class CameraBuffer:
+    """Bounded drop-oldest frame buffer plus the counters of one camera."""
+
+    def __init__(self, name, maxlen):
+        self.name = name
+        self.frames = deque()
+        self.maxlen = maxlen
+        self.finished = False
+        self.counts = {"received": 0, "dropped_full": 0, "dropped_unsynced": 0, "synced": 0}
+        self.timer = StageTimer()  # "wait": arrival -> in a set, "latency": arrival -> detections
+
+    def push(self, frame):
+        if len(self.frames) >= self.maxlen:
+            self.frames.popleft()
+            self.counts["dropped_full"] += 1
+            self.timer.frame_dropped()
+        self.frames.append(frame)
+        self.counts["received"] += 1
+
+    def discard_head(self):
+        self.frames.popleft()
+        self.counts["dropped_unsynced"] += 1
+        self.timer.frame_dropped()
+
+
+class MultiCamSync:
+    """Groups frames of several CameraBuffers into sets whose timestamps lie within tolerance_ms."""
+
+    def __init__(self, buffers, tolerance_ms=TOLERANCE_MS):
+        self.buffers = buffers
+        self.tolerance = tolerance_ms / 1000.0
+        self.changed = asyncio.Event()
+
+    def try_match(self):
+        """Pop one synchronized set (a list of Frames in camera order), or return None if none is ready."""
+        buffers = self.buffers
+        while all(b.frames for b in buffers):
+            newest = max(b.frames[0].timestamp for b in buffers)
+            stale = False
+            for b in buffers:
+                # Heads older than the newest head by more than the tolerance can never be matched again
+                while b.frames and b.frames[0].timestamp < newest - self.tolerance:
+                    b.discard_head()
+                    stale = True
+            if not stale:
+                return [b.frames.popleft() for b in buffers]
+        return None
+
+    def exhausted(self):
+        """True once some camera has ended and has nothing buffered, so no further set can form."""
+        return any(b.finished and not b.frames for b in self.buffers)
+
+    async def next_set(self):
+        while True:
+            frames = self.try_match()
+            if frames is not None or self.exhausted():
+                return frames
+            self.changed.clear()
+            await self.changed.wait()
+
+
+class MultiCamIngest:
+    """Reads all sources concurrently and feeds synchronized sets to one batched detect call per tick."""
+
+    def __init__(self, sources, tolerance_ms=TOLERANCE_MS, queue_size=QUEUE_SIZE):
+        self.sources = sources
+        self.buffers = [CameraBuffer(name, queue_size) for name in sources]
+        self.sync = MultiCamSync(self.buffers, tolerance_ms)
+        self.infer_timer = StageTimer()
+        self.sets = 0
+
+    async def _read(self, buffer, source):
+        seq = 0
+        try:
+            async for timestamp, image in source:
+                buffer.push(Frame(buffer.name, seq, timestamp, time.perf_counter(), image))
+                seq += 1
+                self.sync.changed.set()
+        finally:
+            buffer.finished = True
+            self.sync.changed.set()
+
+    async def run(self, detect, handle=None, max_sets=None):
+        """
+        detect(images) -> one detections array per image, called in a worker thread
+        handle(set_index, frames, detections) is called for every set in order.
+        Returns the number of sets processed.
+        """
+        readers = [asyncio.create_task(self._read(buffer, source))
+                   for buffer, source in zip(self.buffers, self.sources.values())]
+        try:
+            while max_sets is None or self.sets < max_sets:
+                frames = await self.sync.next_set()
+                if frames is None:
+                    break
+                formed = time.perf_counter()
+                for buffer, frame in zip(self.buffers, frames):
+                    buffer.timer.record("wait", formed - frame.arrival)
+
+                # One model call for all cameras; the readers keep filling their buffers meanwhile
+                with self.infer_timer.stage("infer_batch"):
+                    detections = await asyncio.to_thread(detect, [f.image for f in frames])
+
+                done = time.perf_counter()
+                for buffer, frame in zip(self.buffers, frames):
+                    buffer.timer.record("latency", done - frame.arrival)
+                    buffer.timer.frame_done()
+                    buffer.counts["synced"] += 1
+                if handle is not None:
+                    handle(self.sets, frames, detections)
+                self.sets += 1
+        finally:
+            for task in readers:
+                task.cancel()
+            await asyncio.gather(*readers, return_exceptions=True)
+            for buffer in self.buffers:
+                for _ in range(len(buffer.frames)):  # left over at the end, never matched
+                    buffer.discard_head()
+        for task in readers:
+            if not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+        return self.sets
+
+    def report(self):
+        """Print and return per-camera counters and latency percentiles."""
+        stats = {}
+        for buffer in self.buffers:
+            stages = buffer.timer.summary()["stages"]
+            latency = stages.get("latency", {})
+            stats[buffer.name] = dict(buffer.counts, latency_p50_ms=latency.get("p50_ms"),
+                                      latency_p95_ms=latency.get("p95_ms"),
+                                      wait_p50_ms=stages.get("wait", {}).get("p50_ms"))
+            s = stats[buffer.name]
+            print(f"[CAM] {buffer.name}: {s['received']} received, {s['dropped_full']} dropped (buffer full), "
+                  f"{s['dropped_unsynced']} dropped (no match), {s['synced']} synced, "
+                  f"latency p50 {s['latency_p50_ms']} ms / p95 {s['latency_p95_ms']} ms")
+        infer = self.infer_timer.summary()["stages"].get("infer_batch", {})
+        print(f"[CAM] {self.sets} synchronized sets, batched inference p50 {infer.get('p50_ms')} ms")
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest several cameras, synchronize them and detect cones in batches.")
+    parser.add_argument("--camera", action="append", metavar="NAME=SOURCE",
+                        help="camera name and source: a video file, a frame directory or 'synthetic' (repeatable)")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--store", default=STORE_DIR, help="one cone store per camera is written below this")
+    parser.add_argument("--conf", type=float, default=CONF_THRESHOLD)
+    parser.add_argument("--tolerance-ms", type=float, default=TOLERANCE_MS)
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    parser.add_argument("--source-fps", type=float, default=SOURCE_FPS,
+                        help="frame rate of frame directories and synthetic cameras")
+    parser.add_argument("--max-sets", type=int, help="stop after this many synchronized sets")
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+
+    from src.planning.cone_localization import detect_batch
+    from src.planning.cone_store import ConeStoreWriter
+    from src.planning.track_utils import select_track_boxes
+
+    cameras = dict(spec.split("=", 1) for spec in (args.camera or DEFAULT_CAMERAS))
+    sources = {name: open_source(spec, i, args.source_fps) for i, (name, spec) in enumerate(cameras.items())}
+
+    model = YOLO(args.model)
+    print(f"[INFO] ✅ Model loaded from {args.model}")
+
+    stores = {name: ConeStoreWriter(os.path.join(args.store, name)) for name in cameras}
+
+    def handle(index, frames, detections):
+        # Rows line up across the per-camera stores: row i of every store is synchronized set i
+        for frame, boxes in zip(frames, detections):
+            stores[frame.camera].append(f"frame_{index:05d}.jpg", select_track_boxes(boxes),
+                                        frame_shape=frame.image.shape[:2])
+
+    ingest = MultiCamIngest(sources, args.tolerance_ms, args.queue_size)
+    try:
+        asyncio.run(ingest.run(lambda images: detect_batch(model, images, args.conf), handle, args.max_sets))
+    finally:
+        for store in stores.values():
+            store.close()
+    ingest.report()
+    print(f"[INFO] ✅ Cones of {len(cameras)} cameras saved to {args.store}")
+
+
+if __name__ == "__main__":
+    main()
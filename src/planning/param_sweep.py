@@ -0,0 +1,268 @@
+# param_sweep.py
+"""
+Planner parameter sweep over the detections of a recorded session.
+
+The cone store written by cone_localization / stream_pipeline is loaded once
+into padded (frames x cones) arrays. Every planner setting in a grid is then
+evaluated for all frames at once, with no per-frame Python loop and no images:
+
+    ROI trapezoid   top_y, top_x, bottom_x, bottom_y  (fractions, as in new_func)
+    pairing         y_threshold                        (as in pair_cones)
+    fallback        max_hold: frames the last midpoints may be reused (inf = today's planner)
+
+Pairing replays match_cones' greedy matching in lockstep across frames: each
+round makes one match per frame with a few (frames x left x right) array
+operations, so a sweep needs about as many rounds as a frame has cone pairs.
+
+Per setting it reports mean pairs per frame, frames with pairs, frames on
+fallback midpoints, frames without a trajectory, and trajectory jitter: the
+mean frame-to-frame change, in px, of the fitted x at a few reference rows.
+
+Run from the repository root:
+    python -m src.planning.param_sweep --store outputs/cone_data/cones --y-threshold 20 30 40
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from src.planning.cone_store import ConeStore
+from src.planning.track_utils import LEFT_CLASS, RIGHT_CLASS, ROI_BUFFER
+
+# === CONFIG ===
+STORE_DIR = "outputs/cone_data/cones"
+OUTPUT_CSV = "outputs/sweeps/param_sweep.csv"
+# Today's planner: new_func's trapezoid, pair_cones' y_threshold, unlimited fallback
+DEFAULTS = {"top_y": 0.45, "top_x": 0.35, "bottom_x": 0.05, "bottom_y": 0.98, "y_threshold": 30, "max_hold": np.inf}
+GRID = {
+    "top_y": (0.40, 0.45, 0.50, 0.55),
+    "top_x": (0.30, 0.35, 0.40),
+    "bottom_x": (0.0, 0.05, 0.10),
+    "bottom_y": (0.98,),
+    "y_threshold": (15, 20, 30, 40, 50),
+    "max_hold": (0, 5, np.inf),
+}
+JITTER_ROWS = (0.6, 0.75, 0.9)  # fractions of frame height where the fitted x is compared between frames
+CHUNK_ELEMENTS = 1 << 22  # bound on (configs x points x edges) per ROI batch
+
+Session = namedtuple("Session", "cls x y frame_shape names")
+
+
+def load_session(store_dir=STORE_DIR):
+    """
+    All detections of a cone store as padded (frames, max cones) arrays.
+
+    Cone centres are the store's integer centres (ConeStore.cones); padding has cls -1.
+    """
+    store = ConeStore(store_dir)
+    if store.frame_shape is None:
+        raise ValueError(f"Cone store has no frame shape: {store_dir}")
+    counts = np.diff(store.offsets)
+    num_frames, width = len(store), max(int(counts.max(initial=0)), 1)
+    frame = np.repeat(np.arange(num_frames), counts)
+    slot = np.arange(len(frame)) - store.offsets[frame]
+
+    cones = store.cones_range(0, num_frames)
+    cls = np.full((num_frames, width), -1, dtype=np.int16)
+    x = np.zeros((num_frames, width))
+    y = np.zeros((num_frames, width))
+    cls[frame, slot] = cones[:, 0]
+    x[frame, slot] = cones[:, 1]
+    y[frame, slot] = cones[:, 2]
+    return Session(cls, x, y, store.frame_shape, store.names)
+
+
+def roi_polygons(configs, h, w):
+    """(P, 4, 2) trapezoids for configs with top_y/top_x/bottom_x/bottom_y, built like new_func."""
+    polygons = np.empty((len(configs), 4, 2), dtype=np.int32)
+    for i, c in enumerate(configs):
+        polygons[i] = [[int(c["bottom_x"] * w), int(c["bottom_y"] * h)],
+                       [int(c["top_x"] * w), int(c["top_y"] * h)],
+                       [int((1 - c["top_x"]) * w), int(c["top_y"] * h)],
+                       [int((1 - c["bottom_x"]) * w), int(c["bottom_y"] * h)]]
+    return polygons
+
+
+def roi_masks(points, polygons, buffer=ROI_BUFFER):
+    """
+    (P, N) mask of the (N, 2) points inside each of the (P, V, 2) polygons, or
+    within `buffer` px outside; track_utils.roi_mask for many ROIs at once.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    polygons = np.asarray(polygons, dtype=float)
+    masks = np.empty((len(polygons), len(points)), dtype=bool)
+    chunk = max(1, CHUNK_ELEMENTS // max(len(points) * polygons.shape[1], 1))
+    for lo in range(0, len(polygons), chunk):
+        start = polygons[lo:lo + chunk]  # (p, V, 2)
+        edge = np.roll(start, -1, axis=1) - start
+        orientation = np.sign(np.sum(start[..., 0] * np.roll(start[..., 1], -1, axis=1)
+                                     - np.roll(start[..., 0], -1, axis=1) * start[..., 1], axis=1))
+
+        rel = points[None, :, None, :] - start[:, None, :, :]  # (p, N, V, 2)
+        cross = edge[:, None, :, 0] * rel[..., 1] - edge[:, None, :, 1] * rel[..., 0]
+        inside = np.all(cross * orientation[:, None, None] >= 0, axis=2)
+
+        t = np.clip(np.sum(rel * edge[:, None], axis=3) / np.sum(edge ** 2, axis=2)[:, None], 0.0, 1.0)
+        nearest = rel - t[..., None] * edge[:, None]
+        dist = np.sqrt(np.min(np.sum(nearest ** 2, axis=3), axis=2))
+        masks[lo:lo + chunk] = inside | (dist <= buffer)
+    return masks
+
+
+def _compact(keep, *arrays):
+    """Move the kept entries of each row to the front and drop all-padding columns."""
+    order = np.argsort(~keep, axis=1, kind="stable")
+    width = max(int(keep.sum(axis=1).max(initial=0)), 1)
+    order = order[:, :width]
+    return [np.take_along_axis(a, order, axis=1) for a in (keep, *arrays)]
+
+
+def pair_batch(left_y, left_ok, right_y, right_ok, threshold):
+    """
+    match_cones for every frame at once. Inputs are (F, L) / (F, R) padded
+    rows; returns (F, L) indices of the matched right cone, or -1.
+
+    Each round takes, in every frame, the remaining left/right pair with the
+    smallest y difference, lowest left and then right index first on ties,
+    which is exactly the pair match_cones takes next. Frames drop out of the
+    rounds once they have no pair left under the threshold.
+    """
+    num_frames, num_left = left_y.shape
+    num_right = right_y.shape[1]
+    match = np.full((num_frames, num_left), -1)
+    cost = np.abs(left_y[:, :, None] - right_y[:, None, :])
+    cost[~(left_ok[:, :, None] & right_ok[:, None, :] & (cost < threshold))] = np.inf
+    flat = cost.reshape(num_frames, -1)  # row-major view, so argmin breaks ties by (left, right) index
+
+    frames = np.arange(num_frames)
+    while len(frames):
+        best = np.argmin(flat[frames], axis=1)
+        found = np.isfinite(flat[frames, best])
+        frames, best = frames[found], best[found]
+        left, right = np.divmod(best, num_right)
+        match[frames, left] = right
+        cost[frames, left, :] = np.inf
+        cost[frames, :, right] = np.inf
+    return match
+
+
+def fit_batch(mid_x, mid_y, ok, h):
+    """
+    Least-squares x = a*y^2 + b*y + c per frame, like fit_trajectory.
+    Returns (F, 3) coefficients in pixels (NaN where fewer than 3 midpoints).
+    """
+    y = mid_y / h  # scaled for conditioning
+    weight = ok.astype(float)
+    powers = [np.sum(weight * y ** k, axis=1) for k in range(5)]
+    rhs = np.stack([np.sum(weight * mid_x * y ** k, axis=1) for k in (2, 1, 0)], axis=1)
+    m0, m1, m2, m3, m4 = powers
+    normal = np.stack([np.stack([m4, m3, m2], -1), np.stack([m3, m2, m1], -1), np.stack([m2, m1, m0], -1)], axis=1)
+
+    coeffs = np.full((len(mid_x), 3), np.nan)
+    fit = ok.sum(axis=1) >= 3
+    fit[fit] = np.abs(np.linalg.det(normal[fit])) > 1e-12
+    if fit.any():
+        theta = np.linalg.solve(normal[fit], rhs[fit][..., None])[..., 0]
+        coeffs[fit] = theta / np.array([h * h, h, 1.0])
+    return coeffs
+
+
+def sweep(session, grid=GRID, jitter_rows=JITTER_ROWS):
+    """Evaluate every combination in grid; returns one dict of parameters and metrics per setting."""
+    h, w = session.frame_shape
+    num_frames = len(session.cls)
+    roi_keys = ("top_y", "top_x", "bottom_x", "bottom_y")
+    roi_configs = [dict(zip(roi_keys, values)) for values in itertools.product(*(grid[k] for k in roi_keys))]
+    polygons = roi_polygons(roi_configs, h, w)
+
+    # ROI masks for every cone under every trapezoid in one batch
+    present = session.cls >= 0
+    cone_masks = np.zeros((len(roi_configs), *present.shape), dtype=bool)
+    cone_masks[:, present] = roi_masks(np.stack([session.x[present], session.y[present]], axis=1), polygons)
+
+    frames = np.arange(num_frames)
+    ref_y = np.array(jitter_rows) * h
+    results = []
+    for roi, polygon, in_roi in zip(roi_configs, polygons, cone_masks):
+        left_ok, left_x, left_y = _compact(in_roi & (session.cls == LEFT_CLASS), session.x, session.y)
+        right_ok, right_x, right_y = _compact(in_roi & (session.cls == RIGHT_CLASS), session.x, session.y)
+
+        for threshold in grid["y_threshold"]:
+            match = pair_batch(left_y, left_ok, right_y, right_ok, threshold)
+            paired = match >= 0
+            r = np.maximum(match, 0)
+            mid_x = ((left_x + np.take_along_axis(right_x, r, axis=1)) / 2).astype(int)
+            mid_y = ((left_y + np.take_along_axis(right_y, r, axis=1)) / 2).astype(int)
+            mid_ok = paired.copy()
+            mid_ok[paired] = roi_masks(np.stack([mid_x[paired], mid_y[paired]], axis=1), polygon[None])[0]
+
+            pairs = mid_ok.sum(axis=1)
+            own_coeffs = fit_batch(mid_x, mid_y, mid_ok, h)
+            # Most recent frame with pairs, at or before each frame (-1 if none yet)
+            source = np.maximum.accumulate(np.where(pairs > 0, frames, -1))
+
+            for max_hold in grid["max_hold"]:
+                usable = (source >= 0) & (frames - source <= max_hold)
+                fallback = usable & (pairs == 0)
+                coeffs = np.where(usable[:, None], own_coeffs[np.maximum(source, 0)], np.nan)
+                fitted = ~np.isnan(coeffs[:, 0])
+
+                x_ref = coeffs @ np.stack([ref_y ** 2, ref_y, np.ones_like(ref_y)])  # (F, rows)
+                steps = fitted[1:] & fitted[:-1]
+                jumps = np.abs(np.diff(x_ref, axis=0))[steps].mean(axis=1)
+
+                results.append(dict(
+                    roi, y_threshold=threshold, max_hold=max_hold,
+                    mean_pairs=round(float(pairs.mean()), 3) if num_frames else 0.0,
+                    frames_with_pairs=int((pairs > 0).sum()),
+                    fallback_frames=int(fallback.sum()),
+                    no_trajectory_frames=int((~fitted).sum()),
+                    jitter_px=round(float(jumps.mean()), 3) if len(jumps) else None,
+                    jitter_p95_px=round(float(np.percentile(jumps, 95)), 3) if len(jumps) else None,
+                ))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep planner parameters over a recorded session's detections.")
+    parser.add_argument("--store", default=STORE_DIR, help="cone store of the session")
+    parser.add_argument("--output", default=OUTPUT_CSV)
+    for name, values in GRID.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, nargs="+", default=list(values),
+                            help=f"values to try (default: {' '.join(str(v) for v in values)})")
+    parser.add_argument("--top", type=int, default=10, help="settings to print")
+    args = parser.parse_args()
+
+    session = load_session(args.store)
+    grid = {name: getattr(args, name) for name in GRID}
+    num_configs = int(np.prod([len(v) for v in grid.values()]))
+    print(f"[INFO] {len(session.cls)} frames, up to {session.cls.shape[1]} cones each, {num_configs} settings")
+
+    start = time.perf_counter()
+    results = sweep(session, grid)
+    print(f"[INFO] ✅ Swept {len(results)} settings in {time.perf_counter() - start:.2f} s")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+    print(f"[INFO] ✅ Results saved to {args.output}")
+
+    # Fewest frames without a trajectory first, then the steadiest
+    ranked = sorted(results, key=lambda r: (r["no_trajectory_frames"], r["jitter_px"] is None, r["jitter_px"] or 0.0))
+    columns = list(GRID) + ["mean_pairs", "fallback_frames", "no_trajectory_frames", "jitter_px"]
+    widths = [len(c) + 2 for c in columns]
+    print("".join(f"{c:>{n}}" for c, n in zip(columns, widths)))
+    for r in ranked[:args.top]:
+        marker = "  <- current" if all(r[k] == v for k, v in DEFAULTS.items()) else ""
+        print("".join(f"{r[c]!s:>{n}}" for c, n in zip(columns, widths)) + marker)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# planner.py
+"""
+Importable, stateful trajectory planner.
+
+A Planner holds the state of one stream (the last midpoints used as fallback,
+and the incremental fitter if one is used) as attributes instead of module
+globals, so any number of independent streams can be planned in one process:
+
+    planner = Planner(frame_shape=(480, 640))
+    result = planner.step(cones)           # cones: [cls, cx, cy] rows of one frame
+    results = planner.run_batch(frames)    # a list of per-frame arrays, or a padded (F, C, 3) array
+
+Each step filters the cones to the ROI, pairs left and right cones into
+midpoints (falling back to the previous frame's when none are found) and fits
+the centerline. Planning never draws; render.render_plan(frame, result, name)
+is the optional drawing layer on top.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from src.planning.ground_projection import fit_centerline_metric, ground_to_pixels, metric_midpoints, pixels_to_ground
+from src.planning.latency import StageTimer
+from src.planning.track_utils import filter_cones, fit_trajectory, pair_cones, roi_mask
+
+Y_THRESHOLD = 30  # px; see pair_cones
+
+# left_cones/right_cones: (N, 2) cone centres in the ROI
+# midpoints: list of (x, y) int tuples used for this frame (the previous frame's when fallback is True)
+# coeffs/curve_pts: the fitted quadratic and its (N, 2) int32 rasterization, or None
+PlanResult = namedtuple("PlanResult", "left_cones right_cones midpoints fallback coeffs curve_pts")
+
+
+class Planner:
+    """
+    Per-stream planner.
+
+    fitter: optional TrajectoryFitter used instead of a per-frame np.polyfit.
+    metric: pair and fit on the ground plane in metres (ground_projection.py);
+        midpoints and curve come back in pixels.
+    fit: set False to only compute midpoints.
+    filter_midpoints: drop midpoints that fall outside the ROI.
+    """
+
+    def __init__(self, frame_shape=None, y_threshold=Y_THRESHOLD, fitter=None, metric=False, fit=True,
+                 filter_midpoints=True, timer=None):
+        if metric and fitter is not None:
+            raise ValueError("metric mode fits in metres with np.polyfit; it cannot be combined with a fitter")
+        self.frame_shape = tuple(frame_shape[:2]) if frame_shape is not None else None
+        self.y_threshold = y_threshold
+        self.fitter = fitter
+        self.metric = metric
+        self.fit = fit
+        self.filter_midpoints = filter_midpoints
+        self.timer = timer or StageTimer(enabled=False)
+        self.last_midpoints = []
+
+    def reset(self):
+        """Forget the stream's history (e.g. at the start of a new session)."""
+        self.last_midpoints = []
+        if self.fitter is not None:
+            self.fitter.reset()
+
+    def step(self, detections, frame_shape=None):
+        """Plan one frame of [cls, cx, cy] detections and return a PlanResult."""
+        if frame_shape is None:
+            frame_shape = self.frame_shape
+        if frame_shape is None:
+            raise ValueError("frame_shape must be given to the Planner or to step()")
+        h, w = frame_shape[:2]
+
+        with self.timer.stage("roi"):
+            left_cones, right_cones = filter_cones(detections, h, w)
+
+        with self.timer.stage("pair"):
+            if self.metric:
+                midpoints = ground_to_pixels(metric_midpoints(left_cones, right_cones, h, w), h, w).astype(int)
+            else:
+                midpoints = pair_cones(left_cones, right_cones, self.y_threshold)
+            if self.filter_midpoints:
+                midpoints = midpoints[roi_mask(midpoints, h, w)]
+            midpoints = [tuple(pt) for pt in midpoints.tolist()]
+
+        fallback = not midpoints and bool(self.last_midpoints)
+        if midpoints:
+            self.last_midpoints = midpoints
+        else:
+            midpoints = self.last_midpoints
+
+        coeffs = curve_pts = None
+        if self.fit:
+            with self.timer.stage("fit"):
+                if self.metric:
+                    coeffs, centerline = fit_centerline_metric(pixels_to_ground(midpoints, h, w))
+                    if centerline is not None:
+                        curve_pts = ground_to_pixels(centerline, h, w).astype(np.int32)
+                elif self.fitter is not None:
+                    coeffs, curve_pts = self.fitter.fit(midpoints)
+                else:
+                    coeffs, curve_pts = fit_trajectory(midpoints)
+
+        return PlanResult(left_cones, right_cones, midpoints, fallback, coeffs, curve_pts)
+
+    def run_batch(self, detections_array, frame_shape=None):
+        """
+        step() over a whole session, in order; returns one PlanResult per frame.
+
+        detections_array is a sequence of per-frame [cls, cx, cy] arrays, or a
+        padded (F, C, 3) array whose padding rows use any other class id (e.g. -1).
+        """
+        return [self.step(detections, frame_shape) for detections in detections_array]
@@ -1,132 +1,169 @@
+import argparse
 import os
-import numpy as np
 import cv2
 from ultralytics import YOLO
 
+from src.planning.cone_tracker import ConeTracker
+from src.planning.detection_cache import MAX_BYTES, DetectionCache
+from src.planning.frame_scheduler import DEADLINE_MS, DeadlineScheduler, LatestFrameGrabber, capture_source, file_source
+from src.planning.latency import StageTimer
+from src.planning.planner import Planner
+from src.planning.render import render_plan
+from src.planning.staged_pipeline import StagedPipeline
+from src.planning.trajectory_fitter import TrajectoryFitter
+from src.planning.track_utils import boxes_to_cones, crop_for_detection, offset_boxes, roi_crop_rect
+
 # === CONFIG ===
 INPUT_DIR = "outputs/frames_with_cones"
 OUTPUT_DIR = "outputs/trajectory_visuals_realtime"
 MODEL_PATH = r"runs\train\exp\weights\best.pt"  # Replace with actual YOLO model path
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-# === LOAD YOLO MODEL ===
-model = YOLO(MODEL_PATH)
-
-# === Midpoint History ===
-last_midpoints = []
-
-def inside_roi(x, y, polygon):
-    x = float(x)
-    y = float(y)
-    return cv2.pointPolygonTest(polygon, (x, y), True) >= -3
-
-def pair_cones(left_cones, right_cones, y_threshold=30):
-    midpoints = []
-    for lx, ly in left_cones:
-        best_match = None
-        min_y_diff = y_threshold
-        for rx, ry in right_cones:
-            if abs(ly - ry) < min_y_diff:
-                best_match = (rx, ry)
-                min_y_diff = abs(ly - ry)
-        if best_match:
-            mx = int((lx + best_match[0]) / 2)
-            my = int((ly + best_match[1]) / 2)
-            midpoints.append((mx, my))
-    return midpoints
-
-def new_func(h, w):
-    ROI_POLYGON = np.array([
-        [int(0.05 * w), int(0.98 * h)],
-        [int(0.35 * w), int(0.45 * h)],
-        [int(0.65 * w), int(0.45 * h)],
-        [int(0.95 * w), int(0.98 * h)]
-    ], np.int32)
-    return ROI_POLYGON
-
-# === MAIN LOOP ===
-for filename in sorted(os.listdir(INPUT_DIR)):
-    if not filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-        continue
-
-    frame_path = os.path.join(INPUT_DIR, filename)
-    frame = cv2.imread(frame_path)
-    if frame is None:
-        print(f"[WARNING] Could not read frame: {frame_path}")
-        continue
-
-    h, w = frame.shape[:2]
-    ROI_POLYGON = new_func(h, w)
-
-    # Fixed car-top reference point
-    car_pt = (int(w / 2), int(0.75 * h))
-
-    # Run YOLO on this frame
-    results = model(frame, verbose=False)[0]
-    detections = []
-    for box in results.boxes.data.cpu().numpy():
-        x1, y1, x2, y2, conf, cls = box
-        cx = int((x1 + x2) / 2)
-        cy = int((y1 + y2) / 2)
-        detections.append((int(cls), cx, cy))
-
-    # Filter cones
-    left_cones = [(x, y) for cls, x, y in detections if cls == 0 and inside_roi(x, y, ROI_POLYGON)]
-    right_cones = [(x, y) for cls, x, y in detections if cls == 4 and inside_roi(x, y, ROI_POLYGON)]
-
-    midpoints = pair_cones(left_cones, right_cones)
-    midpoints_in_roi = [pt for pt in midpoints if inside_roi(pt[0], pt[1], ROI_POLYGON)]
-
-    if midpoints_in_roi:
-        last_midpoints = midpoints_in_roi
+CONF_THRESHOLD = 0.25
+QUEUE_SIZE = 8  # frames buffered between threaded stages
+WRITERS = 2  # JPEG encode threads in threaded mode
+DETECT_STRIDE = 1  # run YOLO every Nth frame; the tracker predicts cones in between
+SOURCE_FPS = 30.0  # pace at which --realtime replays image folders
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect cones and draw the planned trajectory on each frame.")
+    parser.add_argument("--threaded", action="store_true",
+                        help="overlap decode, inference, planning and encode on separate threads")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    parser.add_argument("--writers", type=int, default=WRITERS)
+    parser.add_argument("--realtime", action="store_true",
+                        help="live mode: always plan on the newest frame and keep each frame within --deadline-ms")
+    parser.add_argument("--deadline-ms", type=float, default=DEADLINE_MS)
+    parser.add_argument("--degrade-imgsz", type=int,
+                        help="inference size to fall back to when full-size inference would miss the deadline")
+    parser.add_argument("--source", help="video file or camera index for --realtime (default: the input frame folder)")
+    parser.add_argument("--source-fps", type=float,
+                        help="replay rate for image folders and video files (default: 30 / the video's FPS)")
+    parser.add_argument("--detect-stride", type=int, default=DETECT_STRIDE,
+                        help="run the detector every Nth frame and track cones in between")
+    parser.add_argument("--roi-crop", action="store_true",
+                        help="run detection only on the planner ROI's bounding rectangle")
+    parser.add_argument("--crop-band", type=float, nargs=2, metavar=("TOP", "BOTTOM"),
+                        help="run detection only on this band of rows (fractions of frame height); implies --roi-crop")
+    parser.add_argument("--fitter", choices=("polyfit", "rls"), default="polyfit",
+                        help="per-frame np.polyfit, or recursive least squares warm-started from the previous frame")
+    parser.add_argument("--metric", action="store_true",
+                        help="pair cones and fit the trajectory in metres on the ground plane (camera in src/config.py)")
+    parser.add_argument("--cache-dir",
+                        help="reuse detections of frames seen before (same pixels, weights and settings) from this cache")
+    parser.add_argument("--cache-size-mb", type=float, default=MAX_BYTES / 2 ** 20,
+                        help="evict least recently used detections beyond this size")
+    parser.add_argument("--profile", action="store_true", help="print per-stage p50/p95/p99 latency at the end")
+    parser.add_argument("--profile-json", help="also write the latency summary to this JSON file")
+    args = parser.parse_args()
+    if args.detect_stride < 1:
+        parser.error("--detect-stride must be at least 1")
+    if args.realtime and args.threaded:
+        parser.error("--realtime and --threaded are mutually exclusive")
+    if args.metric and args.fitter != "polyfit":
+        parser.error("--metric fits in metres with np.polyfit; it cannot be combined with --fitter")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    timer = StageTimer(enabled=args.profile or bool(args.profile_json))
+
+    # === LOAD YOLO MODEL ===
+    model = YOLO(MODEL_PATH)
+    cache = DetectionCache(args.cache_dir, MODEL_PATH, int(args.cache_size_mb * 2 ** 20)) if args.cache_dir else None
+
+    def read_frame(filename):
+        frame_path = os.path.join(INPUT_DIR, filename)
+        with timer.stage("decode"):
+            frame = cv2.imread(frame_path)
+        if frame is None:
+            print(f"[WARNING] Could not read frame: {frame_path}")
+            timer.frame_dropped()
+        return frame
+
+    tracker = ConeTracker() if args.detect_stride > 1 else None
+    roi_crop = args.roi_crop or args.crop_band is not None
+    frame_index = 0
+
+    def run_model(frame, imgsz):
+        size = {"imgsz": imgsz} if imgsz else {}
+        if roi_crop:
+            crop, offset = crop_for_detection(frame, args.crop_band)
+            return offset_boxes(model(crop, conf=CONF_THRESHOLD, verbose=False, **size)[0].boxes.data.cpu().numpy(),
+                                offset)
+        return model(frame, conf=CONF_THRESHOLD, verbose=False, **size)[0].boxes.data.cpu().numpy()
+
+    def cache_variant(frame):
+        # The crop rectangle follows the ROI fractions, so it is part of the cache key
+        if not roi_crop:
+            return "full"
+        h, w = frame.shape[:2]
+        return f"crop{roi_crop_rect(h, w, None if args.crop_band is None else tuple(args.crop_band))}"
+
+    def detect(frame, imgsz=None, skip=False):
+        # Called once per frame, in order, from a single thread (also in threaded mode).
+        # skip: the scheduler has no time for the model; only the tracker's prediction runs
+        nonlocal frame_index
+        boxes = None
+        if not skip and (tracker is None or frame_index % args.detect_stride == 0):
+            if cache is not None:
+                variant = cache_variant(frame)
+                with timer.stage("cache"):
+                    boxes = cache.get(frame, CONF_THRESHOLD, imgsz, variant)
+            if boxes is None:
+                with timer.stage("infer"):
+                    boxes = run_model(frame, imgsz)
+                if cache is not None:
+                    cache.put(frame, CONF_THRESHOLD, imgsz, boxes, variant)
+        frame_index += 1
+        if tracker is None:
+            return boxes_to_cones(boxes if boxes is not None else [])  # skipped: the planner falls back
+        with timer.stage("track"):
+            return boxes_to_cones(tracker.step(boxes, frame.shape))
+
+    def write_frame(filename, frame):
+        with timer.stage("write"):
+            cv2.imwrite(os.path.join(OUTPUT_DIR, filename), frame)
+        timer.frame_done()
+
+    planner = Planner(fitter=TrajectoryFitter() if args.fitter == "rls" else None, metric=args.metric, timer=timer)
+
+    def plan(filename, frame, detections):
+        result = planner.step(detections, frame.shape)
+        with timer.stage("render"):
+            return render_plan(frame, result, filename)
+    filenames = [f for f in sorted(os.listdir(INPUT_DIR)) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+
+    # === MAIN LOOP ===
+    timer.start()
+    if args.realtime:
+        if args.source is None:
+            read_next = file_source([os.path.join(INPUT_DIR, f) for f in filenames])
+            fps = args.source_fps or SOURCE_FPS
+        else:
+            cap = cv2.VideoCapture(int(args.source) if args.source.isdigit() else args.source)
+            if not cap.isOpened():
+                raise IOError(f"Could not open source: {args.source}")
+            read_next = capture_source(cap)
+            # Cameras deliver frames at their own rate; video files are replayed at their FPS
+            fps = args.source_fps or (None if args.source.isdigit() else cap.get(cv2.CAP_PROP_FPS) or SOURCE_FPS)
+        scheduler = DeadlineScheduler(args.deadline_ms, degrade_imgsz=args.degrade_imgsz)
+        scheduler.run(LatestFrameGrabber(read_next, fps=fps, timer=timer), detect, plan, write_frame)
+    elif args.threaded:
+        pipeline = StagedPipeline(read_frame, detect, plan, write_frame,
+                                  queue_size=args.queue_size, writers=args.writers)
+        pipeline.run(filenames)
+        print(f"[INFO] Max queue depths: {pipeline.max_depth}")
     else:
-        midpoints_in_roi = last_midpoints
-
-    # Draw ROI
-    cv2.polylines(frame, [ROI_POLYGON], isClosed=True, color=(0, 255, 0), thickness=2)
-
-    # Draw cones
-    for x, y in left_cones:
-        cv2.circle(frame, (x, y), 6, (255, 0, 0), -1)
-    for x, y in right_cones:
-        cv2.circle(frame, (x, y), 6, (0, 255, 255), -1)
-
-    # Draw midpoints
-    for x, y in midpoints_in_roi:
-        cv2.circle(frame, (x, y), 5, (0, 0, 255), -1)
-
-    # Draw trajectory from car_pt to nearest midpoint and optional second
-    if midpoints_in_roi:
-        dx = midpoints_in_roi[0][0] - car_pt[0]
-        dy = midpoints_in_roi[0][1] - car_pt[1]
-        shrink_factor = 0.15
-        px = int(midpoints_in_roi[0][0] - dx * shrink_factor)
-        py = int(midpoints_in_roi[0][1] - dy * shrink_factor)
-        cv2.arrowedLine(frame, car_pt, (px, py), (0, 255, 0), thickness=4, tipLength=0.25)
-
-        if len(midpoints_in_roi) > 1:
-            cv2.line(frame, midpoints_in_roi[0], midpoints_in_roi[1], (0, 255, 0), 3)
-
-    # Draw quadratic curve if ≥3 midpoints in ROI
-    if len(midpoints_in_roi) >= 3:
-        midpoints_in_roi = sorted(midpoints_in_roi, key=lambda pt: pt[1])
-        x_vals = np.array([pt[0] for pt in midpoints_in_roi])
-        y_vals = np.array([pt[1] for pt in midpoints_in_roi])
-
-        coeffs = np.polyfit(y_vals, x_vals, deg=2)
-        y_fit = np.linspace(y_vals[0], y_vals[-1], 100)
-        x_fit = np.polyval(coeffs, y_fit)
-        curve_pts = np.array([[int(x), int(y)] for x, y in zip(x_fit, y_fit)], dtype=np.int32)
-        cv2.polylines(frame, [curve_pts], isClosed=False, color=(0, 255, 255), thickness=2)
-
-    # Draw car point
-    cv2.circle(frame, car_pt, 6, (0, 255, 0), -1)
-
-    # Text overlay
-    text = f"{filename}: {len(left_cones)} blue, {len(right_cones)} yellow, {len(midpoints_in_roi)} pairs"
-    cv2.putText(frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (180, 255, 180), 2)
-
-    # Save frame
-    cv2.imwrite(os.path.join(OUTPUT_DIR, filename), frame)
-
-print("[INFO] ✅ Trajectory images saved in:", OUTPUT_DIR)
+        for filename in filenames:
+            frame = read_frame(filename)
+            if frame is None:
+                continue
+            write_frame(filename, plan(filename, frame, detect(frame)))
+
+    if cache is not None:
+        cache.close()
+        cache.report()
+    print("[INFO] ✅ Trajectory images saved in:", OUTPUT_DIR)
+    timer.report(args.profile_json)
+
+
+if __name__ == "__main__":
+    main()
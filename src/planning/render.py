@@ -0,0 +1,50 @@
+# render.py
+"""Drawing helpers for planner debug overlays."""
+
+import cv2
+
+from src.planning.track_utils import new_func
+
+
+def render_frame(frame, roi_polygon, left_cones, right_cones, midpoints, curve_pts, label, heading=True):
+    """
+    Draw ROI, cones, midpoints and the fitted trajectory onto the frame in place.
+
+    heading=False leaves out the car point and the heading arrow towards the midpoints.
+    """
+    h, w = frame.shape[:2]
+    car_pt = (int(w / 2), int(0.75 * h))
+
+    cv2.polylines(frame, [roi_polygon], isClosed=True, color=(0, 255, 0), thickness=2)
+    for x, y in left_cones:
+        cv2.circle(frame, (int(x), int(y)), 6, (255, 0, 0), -1)
+    for x, y in right_cones:
+        cv2.circle(frame, (int(x), int(y)), 6, (0, 255, 255), -1)
+    for x, y in midpoints:
+        cv2.circle(frame, (int(x), int(y)), 5, (0, 0, 255), -1)
+
+    if heading and midpoints:
+        dx = midpoints[0][0] - car_pt[0]
+        dy = midpoints[0][1] - car_pt[1]
+        shrink_factor = 0.15
+        px = int(midpoints[0][0] - dx * shrink_factor)
+        py = int(midpoints[0][1] - dy * shrink_factor)
+        cv2.arrowedLine(frame, car_pt, (px, py), (0, 255, 0), thickness=4, tipLength=0.25)
+        if len(midpoints) > 1:
+            cv2.line(frame, midpoints[0], midpoints[1], (0, 255, 0), 3)
+
+    if curve_pts is not None:
+        cv2.polylines(frame, [curve_pts], isClosed=False, color=(0, 255, 255), thickness=2)
+
+    if heading:
+        cv2.circle(frame, car_pt, 6, (0, 255, 0), -1)
+    cv2.putText(frame, label, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (180, 255, 180), 2)
+    return frame
+
+
+def render_plan(frame, result, name, heading=True):
+    """Draw a planner.PlanResult onto the frame in place, labelled with the frame name and counts."""
+    h, w = frame.shape[:2]
+    label = f"{name}: {len(result.left_cones)} blue, {len(result.right_cones)} yellow, {len(result.midpoints)} pairs"
+    return render_frame(frame, new_func(h, w), result.left_cones, result.right_cones, result.midpoints,
+                        result.curve_pts, label, heading)
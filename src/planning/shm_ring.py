@@ -0,0 +1,262 @@
+# shm_ring.py
+"""
+Multi-process video detection over a shared-memory frame ring.
+
+One decoder process reads cv2.VideoCapture frames straight into a fixed ring
+of frame slots in multiprocessing.shared_memory. K inference processes, each
+with its own model, read those slots in place, so a frame is never pickled or
+copied between processes. Only small index messages go through the queues:
+
+    free     slot                 slots the decoder may fill
+    work     (seq, slot, name)    decoded frames waiting for a worker
+    results  ("boxes", seq, name, boxes, frame_shape) and control messages
+
+A slot is always in exactly one place: the free queue, the work queue, the
+decoder, or the one worker reading it. A worker puts its slot back on the free
+queue as soon as it no longer reads the frame: after inference, or after
+copying the crop with --roi-crop / --crop-band. The ring size therefore bounds
+frames in flight, and a slow worker stalls the decoder instead of growing memory.
+Workers finish out of order, so the main process reassembles results by
+sequence number and appends them to a cone store in frame order.
+
+Run from the repository root:
+    python -m src.planning.shm_ring --video Test_videos/Skidpad_FSE.mp4 --workers 4
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from src.planning.cone_store import ConeStoreWriter
+from src.planning.track_utils import crop_for_detection, offset_boxes, select_track_boxes
+
+# === CONFIG ===
+VIDEO_PATH = r"C:\Users\Lenovo\Github\FSD-Navigation\Test_videos\Skidpad_FSE.mp4"
+MODEL_PATH = "runs/train/exp/weights/best.pt"
+CONF_THRESHOLD = 0.25
+RESIZE = (640, 480)  # same frame size as extract_frames.py
+STORE_DIR = "outputs/cone_data/cones"
+WORKERS = 2
+SLOTS_PER_WORKER = 2  # ring slots per inference process; one being read, one ready
+POLL_SECONDS = 1.0  # how often the main process checks for dead children while waiting
+
+
+class FrameRing:
+    """
+    num_slots uint8 frames of frame_shape in one shared memory block.
+
+    Create it in the main process, pass ring.spec() to children and re-open it
+    there with FrameRing.attach(*spec). slot(i) is a zero-copy view.
+    """
+
+    def __init__(self, num_slots, frame_shape, name=None):
+        self.num_slots = num_slots
+        self.frame_shape = tuple(frame_shape)
+        size = num_slots * int(np.prod(self.frame_shape))
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.frames = np.ndarray((num_slots, *self.frame_shape), dtype=np.uint8, buffer=self.shm.buf)
+
+    @classmethod
+    def attach(cls, name, num_slots, frame_shape):
+        return cls(num_slots, frame_shape, name=name)
+
+    def spec(self):
+        return self.shm.name, self.num_slots, self.frame_shape
+
+    def slot(self, i):
+        return self.frames[i]
+
+    def close(self):
+        del self.frames  # the view must go before the buffer can be released
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _decode_worker(video_path, ring_spec, resize, free_q, work_q, results_q, num_workers):
+    ring = FrameRing.attach(*ring_spec)
+    try:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise IOError(f"Could not open video: {video_path}")
+
+        seq = 0
+        while True:
+            slot = free_q.get()
+            view = ring.slot(slot)
+            if resize:
+                ok, frame = cap.read()
+                if ok:
+                    cv2.resize(frame, resize, dst=view)
+            else:
+                ok, frame = cap.read(view)  # decodes straight into shared memory
+                if ok and frame is not view:  # OpenCV reallocated (frame size changed mid-stream)
+                    view[...] = cv2.resize(frame, view.shape[1::-1])
+            if not ok:
+                free_q.put(slot)
+                break
+            work_q.put((seq, slot, f"frame_{seq:05d}.jpg"))
+            seq += 1
+        cap.release()
+        results_q.put(("decoded", seq))
+    except Exception as e:
+        results_q.put(("error", "decoder", f"{type(e).__name__}: {e}"))
+    finally:
+        for _ in range(num_workers):
+            work_q.put(None)
+        ring.close()
+
+
+def _infer_worker(worker_id, model_path, ring_spec, conf, crop_band, roi_crop, threads,
+                  free_q, work_q, results_q):
+    ring = FrameRing.attach(*ring_spec)
+    try:
+        import torch
+        from ultralytics import YOLO
+
+        torch.set_num_threads(threads)
+        cv2.setNumThreads(threads)
+        model = YOLO(model_path)
+
+        while (msg := work_q.get()) is not None:
+            seq, slot, name = msg
+            frame = ring.slot(slot)
+            try:
+                if roi_crop or crop_band is not None:
+                    crop, offset = crop_for_detection(frame, crop_band)
+                    if np.shares_memory(crop, frame):  # a full-width band is already contiguous, i.e. a view
+                        crop = crop.copy()
+                    free_q.put(slot)  # the crop is private now, so the decoder may refill the slot
+                    slot = None
+                    boxes = offset_boxes(model(crop, conf=conf, verbose=False)[0].boxes.data.cpu().numpy(), offset)
+                else:
+                    boxes = model(frame, conf=conf, verbose=False)[0].boxes.data.cpu().numpy()
+                boxes = select_track_boxes(boxes)
+            except Exception as e:
+                # Report the frame and store it without cones, so reassembly is not stuck waiting for seq
+                results_q.put(("error", f"worker {worker_id}, {name}", f"{type(e).__name__}: {e}"))
+                boxes = np.empty((0, 6), dtype=np.float32)
+            finally:
+                if slot is not None:  # also on a failing frame, so the ring never loses a slot
+                    free_q.put(slot)
+            results_q.put(("boxes", seq, name, boxes, frame.shape[:2]))
+    except Exception as e:
+        results_q.put(("error", f"worker {worker_id}", f"{type(e).__name__}: {e}"))
+    finally:
+        results_q.put(("worker_done", worker_id))
+        ring.close()
+
+
+def _frame_shape(video_path, resize):
+    if resize:
+        return resize[1], resize[0], 3
+    cap = cv2.VideoCapture(video_path)
+    ok, frame = cap.read()
+    cap.release()
+    if not ok:
+        raise IOError(f"Could not read a frame from: {video_path}")
+    return frame.shape
+
+
+def run_ring(video_path, model_path, store_dir=STORE_DIR, workers=WORKERS, slots=None, conf=CONF_THRESHOLD,
+             resize=RESIZE, roi_crop=False, crop_band=None, threads_per_worker=None):
+    """
+    Detect cones in every frame of video_path with `workers` inference processes
+    and write them to the cone store at store_dir in frame order.
+
+    Returns the number of frames written.
+    """
+    slots = slots or SLOTS_PER_WORKER * workers + 1
+    threads = threads_per_worker or max(1, (os.cpu_count() or 1) // (workers + 1))
+    ring = FrameRing(slots, _frame_shape(video_path, resize))
+
+    # spawn, so children start clean (no inherited torch/OpenCV thread pools) and it also works on Windows
+    ctx = mp.get_context("spawn")
+    free_q, work_q, results_q = ctx.Queue(), ctx.Queue(), ctx.Queue()
+    for slot in range(slots):
+        free_q.put(slot)
+
+    procs = [ctx.Process(target=_decode_worker, name="decode",
+                         args=(video_path, ring.spec(), resize, free_q, work_q, results_q, workers))]
+    procs += [ctx.Process(target=_infer_worker, name=f"infer-{i}",
+                          args=(i, model_path, ring.spec(), conf, crop_band, roi_crop, threads,
+                                free_q, work_q, results_q))
+              for i in range(workers)]
+    for p in procs:
+        p.start()
+
+    store = ConeStoreWriter(store_dir)
+    pending = {}  # seq -> (name, boxes, frame_shape) that finished ahead of an earlier frame
+    next_seq = 0
+    workers_done = 0
+    errors = []
+    try:
+        while workers_done < workers:
+            try:
+                msg = results_q.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                dead = [p.name for p in procs if p.exitcode not in (None, 0)]
+                if dead:
+                    raise RuntimeError(f"process(es) died without reporting: {', '.join(dead)}")
+                continue
+
+            kind = msg[0]
+            if kind == "boxes":
+                pending[msg[1]] = msg[2:]
+                while next_seq in pending:
+                    name, boxes, frame_shape = pending.pop(next_seq)
+                    store.append(name, boxes, frame_shape=frame_shape)
+                    next_seq += 1
+            elif kind == "worker_done":
+                workers_done += 1
+            elif kind == "error":
+                errors.append(f"{msg[1]}: {msg[2]}")
+                print(f"[WARNING] {errors[-1]}")
+    finally:
+        store.close()
+        for p in procs:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+        ring.close()
+
+    if errors:
+        raise RuntimeError(f"{len(errors)} error(s), first: {errors[0]}")
+    return next_seq
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect cones in a video with parallel inference processes.")
+    parser.add_argument("--video", default=VIDEO_PATH)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--conf", type=float, default=CONF_THRESHOLD)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="inference processes, one model each")
+    parser.add_argument("--slots", type=int, help=f"frame slots in the ring (default {SLOTS_PER_WORKER} per worker + 1)")
+    parser.add_argument("--threads-per-worker", type=int,
+                        help="torch/OpenCV threads per inference process (default: CPU count / processes)")
+    parser.add_argument("--no-resize", action="store_true", help=f"keep the video's own frame size instead of {RESIZE}")
+    parser.add_argument("--roi-crop", action="store_true",
+                        help="run detection only on the planner ROI's bounding rectangle")
+    parser.add_argument("--crop-band", type=float, nargs=2, metavar=("TOP", "BOTTOM"),
+                        help="run detection only on this band of rows (fractions of frame height); implies --roi-crop")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    frame_count = run_ring(args.video, args.model, args.store, workers=args.workers, slots=args.slots,
+                           conf=args.conf, resize=None if args.no_resize else RESIZE, roi_crop=args.roi_crop,
+                           crop_band=args.crop_band, threads_per_worker=args.threads_per_worker)
+    elapsed = time.perf_counter() - start
+    print(f"[INFO] ✅ {frame_count} frames in {elapsed:.1f} s ({frame_count / elapsed:.1f} FPS) "
+          f"with {args.workers} workers, cones saved to {args.store}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# staged_pipeline.py
+"""
+Threaded decode -> infer -> plan -> write pipeline.
+
+Each stage runs on its own thread (the writer on a small pool) and stages are
+connected by bounded queues, so a slow stage blocks the ones upstream of it
+instead of letting frames pile up in memory. OpenCV and torch release the GIL
+in their heavy calls, which lets JPEG decode, inference and JPEG encode overlap.
+
+Decode, infer and plan each run on a single thread, so frames reach the
+planner in input order and planner state (e.g. the midpoint fallback) stays
+consistent. Write results are handed back in input order as well.
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_DONE = object()  # end-of-stream marker passed down the queues
+
+
+class StagedPipeline:
+    """
+    decode(item) -> frame or None (skipped)
+    infer(frame) -> detections
+    plan(item, frame, detections) -> output
+    write(item, output) -> result
+    """
+
+    def __init__(self, decode, infer, plan, write, queue_size=8, writers=2, report_every=100):
+        self.decode = decode
+        self.infer = infer
+        self.plan = plan
+        self.write = write
+        self.writers = writers
+        self.report_every = report_every
+
+        self.queues = {
+            "decoded": queue.Queue(maxsize=queue_size),
+            "inferred": queue.Queue(maxsize=queue_size),
+            "planned": queue.Queue(maxsize=queue_size),
+        }
+        self.max_depth = {name: 0 for name in self.queues}
+        self._stop = threading.Event()
+        self._errors = []
+
+    def queue_depths(self):
+        """Current number of frames waiting in each queue."""
+        return {name: q.qsize() for name, q in self.queues.items()}
+
+    def _put(self, name, item):
+        q = self.queues[name]
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                self.max_depth[name] = max(self.max_depth[name], q.qsize())
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, name):
+        q = self.queues[name]
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _run_stage(self, body):
+        try:
+            body()
+        except Exception as e:  # surface worker errors from run()
+            self._errors.append(e)
+            self._stop.set()
+
+    def _decode_stage(self, items):
+        for seq, item in enumerate(items):
+            if self._stop.is_set():
+                break
+            frame = self.decode(item)
+            if frame is not None:
+                self._put("decoded", (seq, item, frame))
+        self._put("decoded", _DONE)
+
+    def _infer_stage(self):
+        while (job := self._get("decoded")) is not _DONE:
+            seq, item, frame = job
+            self._put("inferred", (seq, item, frame, self.infer(frame)))
+        self._put("inferred", _DONE)
+
+    def _plan_stage(self):
+        planned = 0
+        while (job := self._get("inferred")) is not _DONE:
+            seq, item, frame, detections = job
+            self._put("planned", (seq, item, self.plan(item, frame, detections)))
+            planned += 1
+            if self.report_every and planned % self.report_every == 0:
+                depths = ", ".join(f"{k}={v}" for k, v in self.queue_depths().items())
+                print(f"[QUEUE] {planned} frames planned | {depths}")
+        for _ in range(self.writers):
+            self._put("planned", _DONE)
+
+    def _write_stage(self, results):
+        while (job := self._get("planned")) is not _DONE:
+            seq, item, output = job
+            results[seq] = self.write(item, output)
+
+    def run(self, items):
+        """Push all items through the pipeline and return the write results in input order."""
+        results = {}
+        threads = [
+            threading.Thread(target=self._run_stage, args=(lambda: self._decode_stage(items),), name="decode"),
+            threading.Thread(target=self._run_stage, args=(self._infer_stage,), name="infer"),
+            threading.Thread(target=self._run_stage, args=(self._plan_stage,), name="plan"),
+        ]
+        for t in threads:
+            t.start()
+        with ThreadPoolExecutor(max_workers=self.writers, thread_name_prefix="write") as pool:
+            for _ in range(self.writers):
+                pool.submit(self._run_stage, lambda: self._write_stage(results))
+        for t in threads:
+            t.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return [results[seq] for seq in sorted(results)]
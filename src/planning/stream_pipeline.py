@@ -0,0 +1,149 @@
+# stream_pipeline.py
+"""
+Single-process video -> cones -> trajectory pipeline.
+
+Frames are pulled straight from cv2.VideoCapture and kept in memory, so the
+only files written are the final outputs (cone store, midpoints,
+trajectory coefficients and, optionally, a rendered video). Pass
+--keep-frames to also dump the intermediate JPEGs the step-by-step scripts
+produce, for debugging.
+
+Run from the repository root:
+    python -m src.planning.stream_pipeline --video Test_videos/Skidpad_FSE.mp4
+"""
+
+import argparse
+import os
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from src.planning.cone_store import ConeStoreWriter
+from src.planning.planner import Planner
+from src.planning.render import render_plan
+from src.planning.trajectory_fitter import TrajectoryFitter
+from src.planning.track_utils import LEFT_CLASS, boxes_to_cones, crop_for_detection, offset_boxes, select_track_boxes
+
+# === CONFIG ===
+VIDEO_PATH = r"C:\Users\Lenovo\Github\FSD-Navigation\Test_videos\Skidpad_FSE.mp4"
+MODEL_PATH = "runs/train/exp/weights/best.pt"
+OUTPUT_DIR = "outputs"
+CONF_THRESHOLD = 0.25
+RESIZE = (640, 480)  # same frame size as extract_frames.py
+
+
+def run_stream(video_path, model, output_dir=OUTPUT_DIR, conf=CONF_THRESHOLD, resize=RESIZE,
+               keep_frames=False, render=False, roi_crop=False, crop_band=None, fitter=None):
+    """
+    Process one video end to end in memory and write the final outputs to output_dir.
+
+    roi_crop runs detection only on the ROI's bounding rectangle, or on the
+    (top, bottom) row band crop_band when given (see track_utils.roi_crop_rect).
+    fitter: optional TrajectoryFitter used instead of a per-frame np.polyfit.
+    """
+    if keep_frames:
+        raw_dir = os.path.join(output_dir, "video_frames")
+        cones_dir = os.path.join(output_dir, "frames_with_cones")
+        os.makedirs(raw_dir, exist_ok=True)
+        os.makedirs(cones_dir, exist_ok=True)
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {video_path}")
+
+    writer = None
+    store = ConeStoreWriter(os.path.join(output_dir, "cone_data", "cones"))
+    planner = Planner(fitter=fitter)
+    midpoints_data = {}
+    coeffs_data = []
+    frame_count = 0
+
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if resize:
+                frame = cv2.resize(frame, resize)
+            fname = f"frame_{frame_count:05d}.jpg"
+
+            h, w = frame.shape[:2]
+            if keep_frames:
+                cv2.imwrite(os.path.join(raw_dir, fname), frame)
+
+            # === Detection ===
+            if roi_crop or crop_band is not None:
+                crop, offset = crop_for_detection(frame, crop_band)
+                boxes = offset_boxes(model(crop, conf=conf, verbose=False)[0].boxes.data.cpu().numpy(), offset)
+            else:
+                boxes = model(frame, conf=conf, verbose=False)[0].boxes.data.cpu().numpy()
+            boxes = select_track_boxes(boxes)
+            cones = boxes_to_cones(boxes)
+            store.append(fname, boxes, frame_shape=(h, w))
+
+            if keep_frames:
+                debug = frame.copy()
+                for cls_id, cx, cy in cones:
+                    color = (255, 0, 0) if cls_id == LEFT_CLASS else (0, 255, 255)
+                    cv2.circle(debug, (int(cx), int(cy)), 6, color, -1)
+                cv2.imwrite(os.path.join(cones_dir, fname), debug)
+
+            # === Planning ===
+            result = planner.step(cones, (h, w))
+            midpoints_data[fname] = np.array(result.midpoints, dtype=int).reshape(-1, 2)
+            coeffs_data.append(result.coeffs if result.coeffs is not None else np.full(3, np.nan))
+
+            if render:
+                if writer is None:
+                    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+                    writer = cv2.VideoWriter(os.path.join(output_dir, "trajectory.mp4"),
+                                             cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+                writer.write(render_plan(frame, result, fname))
+
+            frame_count += 1
+    finally:
+        # Also on a decode or inference error, so the cone store is left with a consistent index
+        cap.release()
+        store.close()
+        if writer is not None:
+            writer.release()
+
+    # === SAVE RESULTS ===
+    np.savez_compressed(os.path.join(output_dir, "midpoints.npz"), **midpoints_data)
+    np.savez_compressed(os.path.join(output_dir, "trajectory.npz"),
+                        frames=np.array(sorted(midpoints_data)),
+                        coeffs=np.array(coeffs_data).reshape(-1, 3))
+    return frame_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a video through detection and trajectory planning.")
+    parser.add_argument("--video", default=VIDEO_PATH)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=OUTPUT_DIR)
+    parser.add_argument("--conf", type=float, default=CONF_THRESHOLD)
+    parser.add_argument("--keep-frames", action="store_true",
+                        help="also write raw and cone-annotated JPEGs for debugging")
+    parser.add_argument("--render", action="store_true",
+                        help="write the trajectory overlay as trajectory.mp4")
+    parser.add_argument("--roi-crop", action="store_true",
+                        help="run detection only on the planner ROI's bounding rectangle")
+    parser.add_argument("--crop-band", type=float, nargs=2, metavar=("TOP", "BOTTOM"),
+                        help="run detection only on this band of rows (fractions of frame height); implies --roi-crop")
+    parser.add_argument("--fitter", choices=("polyfit", "rls"), default="polyfit",
+                        help="per-frame np.polyfit, or recursive least squares warm-started from the previous frame")
+    args = parser.parse_args()
+
+    model = YOLO(args.model)
+    print(f"[INFO] ✅ Model loaded from {args.model}")
+
+    frame_count = run_stream(args.video, model, args.output, conf=args.conf,
+                             keep_frames=args.keep_frames, render=args.render,
+                             roi_crop=args.roi_crop, crop_band=args.crop_band,
+                             fitter=TrajectoryFitter() if args.fitter == "rls" else None)
+    print(f"[INFO] ✅ Processed {frame_count} frames, outputs saved in: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
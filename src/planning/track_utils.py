@@ -0,0 +1,252 @@
+# track_utils.py
+"""Cone filtering, pairing and trajectory helpers shared by the planning pipeline."""
+
+import heapq
+from functools import lru_cache
+
+import numpy as np
+
+# Blue (left) and yellow (right) cone class IDs
+LEFT_CLASS = 0
+RIGHT_CLASS = 4
+
+# Cones up to this many px outside the ROI polygon still count as inside
+ROI_BUFFER = 3
+
+# Context kept around the ROI when cropping frames for detection, as a fraction of
+# frame height, so cones whose centre is just inside the ROI are still seen whole
+ROI_CROP_MARGIN = 0.05
+
+
+def match_cones(left_y, right_y, threshold):
+    """
+    One-to-one matching of left and right cones on a single coordinate.
+
+    Pairs with |left_y - right_y| < threshold are taken greedily in
+    (difference, left index, right index) order, so ties go to the lowest
+    indices. Returns, for every left cone, the index of its right cone or -1.
+
+    The closest remaining pairs always lie within one group of equal
+    coordinates or between two neighbouring groups, so only one candidate per
+    group and per pair of neighbouring groups goes on the heap:
+    O((L + R) log(L + R)) rather than one candidate per left/right combination.
+    """
+    left_y = np.asarray(left_y, dtype=float)
+    right_y = np.asarray(right_y, dtype=float)
+    num_left = len(left_y)
+    match = np.full(num_left, -1)
+    if num_left == 0 or len(right_y) == 0:
+        return match
+
+    # Cones grouped by coordinate value; groups kept as a doubly linked list of non-empty ones
+    values, group = np.unique(np.concatenate([left_y, right_y]), return_inverse=True)
+    group = group.ravel().tolist()
+    values = values.tolist()
+    n = len(values)
+    # Indices in descending order, so [-1] is the lowest remaining index of each side
+    lefts = [[] for _ in range(n)]
+    rights = [[] for _ in range(n)]
+    for i in range(num_left - 1, -1, -1):
+        lefts[group[i]].append(i)
+    for j in range(len(right_y) - 1, -1, -1):
+        rights[group[num_left + j]].append(j)
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+
+    def best(a, b):
+        """Lowest (difference, left, right) pair between groups a <= b, or None."""
+        if a < 0 or b >= n or values[b] - values[a] >= threshold:
+            return None
+        pair = None
+        if lefts[a] and rights[b]:
+            pair = (values[b] - values[a], lefts[a][-1], rights[b][-1])
+        if a != b and lefts[b] and rights[a] and (pair is None or lefts[b][-1] < pair[1]):
+            pair = (values[b] - values[a], lefts[b][-1], rights[a][-1])
+        return pair
+
+    def push(a, b):
+        pair = best(a, b)
+        if pair is not None:
+            heapq.heappush(heap, pair)
+
+    heap = [pair for g in range(n) for pair in (best(g, g), best(g, g + 1)) if pair is not None]
+    heapq.heapify(heap)
+
+    while heap:
+        _, l, r = heapq.heappop(heap)
+        # A cone only ever leaves its group as the group's lowest index, so alive means still at [-1]
+        gl, gr = group[l], group[num_left + r]
+        if not (lefts[gl] and lefts[gl][-1] == l and rights[gr] and rights[gr][-1] == r):
+            continue
+        match[l] = r
+        lefts[gl].pop()
+        rights[gr].pop()
+
+        for g in {gl, gr}:
+            if lefts[g] or rights[g]:
+                push(g, g)
+                push(prev[g], g)
+                push(g, nxt[g])
+            else:
+                # Drop the empty group; its neighbours become adjacent
+                p, q = prev[g], nxt[g]
+                if p >= 0:
+                    nxt[p] = q
+                if q < n:
+                    prev[q] = p
+                push(p, q)
+    return match
+
+
+def pair_cones(left_cones, right_cones, y_threshold=30):
+    """
+    Pair left (blue) and right (yellow) cones by Y alignment, and return midpoints.
+
+    Each cone is used at most once (see match_cones). Midpoints are returned
+    as an (N, 2) int array, ordered like the matched left cones.
+    """
+    left = np.asarray(left_cones, dtype=float).reshape(-1, 2)
+    right = np.asarray(right_cones, dtype=float).reshape(-1, 2)
+    match = match_cones(left[:, 1], right[:, 1], y_threshold)
+    matched = np.flatnonzero(match >= 0)
+    return ((left[matched] + right[match[matched]]) / 2).astype(int)
+
+
+@lru_cache(maxsize=8)
+def new_func(h, w):
+    """Trapezoid ROI for an (h, w) frame. Built once per frame size; treat as read-only."""
+    ROI_POLYGON = np.array([
+        [int(0.05 * w), int(0.98 * h)],  # bottom-left corner (near bottom edge)
+        [int(0.35 * w), int(0.45 * h)],  # upper-left inward
+        [int(0.65 * w), int(0.45 * h)],  # upper-right inward
+        [int(0.95 * w), int(0.98 * h)]   # bottom-right corner
+    ], np.int32)
+    ROI_POLYGON.setflags(write=False)
+    return ROI_POLYGON
+
+
+@lru_cache(maxsize=8)
+def _roi_edges(h, w):
+    """Edge start points, edge vectors and squared lengths of the ROI polygon."""
+    start = new_func(h, w).astype(float)
+    edge = np.roll(start, -1, axis=0) - start
+    # Sign of the polygon area, so the inside test does not depend on vertex order
+    orientation = np.sign(np.sum(start[:, 0] * np.roll(start[:, 1], -1) - np.roll(start[:, 0], -1) * start[:, 1]))
+    return start, edge, np.sum(edge ** 2, axis=1), orientation
+
+
+def roi_mask(points, h, w, buffer=ROI_BUFFER):
+    """
+    Return a boolean mask of the (N, 2) points that lie inside the ROI of an
+    (h, w) frame, or within `buffer` px outside it.
+
+    Matches cv2.pointPolygonTest(polygon, pt, True) >= -buffer, evaluated for
+    all points at once: half-plane tests for the inside, and the exact distance
+    to the nearest edge segment for points just outside.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    start, edge, edge_len2, orientation = _roi_edges(h, w)
+
+    rel = points[:, None, :] - start[None, :, :]  # (N, 4, 2)
+    cross = edge[None, :, 0] * rel[:, :, 1] - edge[None, :, 1] * rel[:, :, 0]
+    inside = np.all(cross * orientation >= 0, axis=1)
+
+    t = np.clip(np.sum(rel * edge[None], axis=2) / edge_len2, 0.0, 1.0)
+    nearest = rel - t[:, :, None] * edge[None]
+    dist = np.sqrt(np.min(np.sum(nearest ** 2, axis=2), axis=1))
+    return inside | (dist <= buffer)
+
+
+@lru_cache(maxsize=8)
+def roi_crop_rect(h, w, band=None, margin=ROI_CROP_MARGIN):
+    """
+    (x0, y0, x1, y1) rectangle of an (h, w) frame to run detection on.
+
+    By default this is the bounding rectangle of the planner ROI (new_func),
+    grown by `margin` * h on every side; band=(top, bottom) instead selects the
+    full-width rows between those fractions of the frame height.
+    """
+    if band is not None:
+        top, bottom = band
+        return 0, max(int(top * h), 0), w, min(int(np.ceil(bottom * h)), h)
+
+    polygon = new_func(h, w)
+    pad = int(margin * h) + ROI_BUFFER
+    x0, y0 = polygon.min(axis=0) - pad
+    x1, y1 = polygon.max(axis=0) + pad + 1
+    return max(int(x0), 0), max(int(y0), 0), min(int(x1), w), min(int(y1), h)
+
+
+def crop_for_detection(frame, band=None):
+    """Crop a frame to roi_crop_rect; returns the contiguous crop and its (x, y) offset."""
+    h, w = frame.shape[:2]
+    x0, y0, x1, y1 = roi_crop_rect(h, w, None if band is None else tuple(band))
+    return np.ascontiguousarray(frame[y0:y1, x0:x1]), (x0, y0)
+
+
+def offset_boxes(boxes, offset):
+    """Shift [x1, y1, x2, y2, conf, cls] rows detected on a crop back into full-frame pixels."""
+    boxes = np.array(boxes, dtype=np.float32).reshape(-1, 6)
+    boxes[:, [0, 2]] += offset[0]
+    boxes[:, [1, 3]] += offset[1]
+    return boxes
+
+
+def filter_cones(detections, h, w):
+    """
+    Split [cls, cx, cy] detections into (left, right) (N, 2) arrays of blue and
+    yellow cone centers inside the ROI.
+    """
+    cones = np.asarray(detections).reshape(-1, 3)
+    keep = roi_mask(cones[:, 1:], h, w)
+    left_cones = cones[keep & (cones[:, 0] == LEFT_CLASS), 1:]
+    right_cones = cones[keep & (cones[:, 0] == RIGHT_CLASS), 1:]
+    return left_cones, right_cones
+
+
+def select_track_boxes(boxes, classes=(LEFT_CLASS, RIGHT_CLASS)):
+    """Keep only the YOLO rows [x1, y1, x2, y2, conf, cls] of the requested classes."""
+    boxes = np.asarray(boxes).reshape(-1, 6)
+    return boxes[np.isin(boxes[:, 5].astype(int), classes)]
+
+
+def boxes_to_cones(boxes, classes=(LEFT_CLASS, RIGHT_CLASS)):
+    """
+    Convert YOLO rows [x1, y1, x2, y2, conf, cls] into an (N, 3) int array of
+    [cls, cx, cy], keeping only the requested classes (all of them if classes is None).
+    """
+    boxes = np.asarray(boxes)
+    if boxes.size == 0:
+        return np.empty((0, 3), dtype=int)
+
+    cls = boxes[:, 5].astype(int)
+    xyxy = boxes[:, :4].astype(int)
+    cones = np.stack([cls, (xyxy[:, 0] + xyxy[:, 2]) // 2, (xyxy[:, 1] + xyxy[:, 3]) // 2], axis=1)
+    return cones if classes is None else cones[np.isin(cls, classes)]
+
+
+def curve_points(coeffs, y_start, y_end, num_points=100):
+    """Rasterize x = polyval(coeffs, y) for y from y_start to y_end into an (N, 2) int32 array of [x, y]."""
+    y_fit = np.linspace(y_start, y_end, num_points)
+    a, b, c = coeffs
+    curve = np.empty((num_points, 2), dtype=np.int32)
+    curve[:, 0] = (a * y_fit + b) * y_fit + c  # Horner, as np.polyval; truncated like int()
+    curve[:, 1] = y_fit
+    return curve
+
+
+def fit_trajectory(midpoints, num_points=100):
+    """
+    Fit x = f(y) as a quadratic through the midpoints.
+
+    Returns (coeffs, curve_pts), or (None, None) when fewer than 3 midpoints are given.
+    """
+    if len(midpoints) < 3:
+        return None, None
+
+    midpoints = np.asarray(midpoints, dtype=float).reshape(-1, 2)
+    midpoints = midpoints[np.argsort(midpoints[:, 1], kind="stable")]
+    x_vals, y_vals = midpoints[:, 0], midpoints[:, 1]
+
+    coeffs = np.polyfit(y_vals, x_vals, deg=2)
+    return coeffs, curve_points(coeffs, y_vals[0], y_vals[-1], num_points)
@@ -0,0 +1,122 @@
+# trajectory_fitter.py
+"""
+Incremental quadratic trajectory fitting.
+
+TrajectoryFitter fits the same x = a*y^2 + b*y + c centerline as
+track_utils.fit_trajectory, but as exponentially weighted recursive least
+squares: each frame's midpoints are added to running 3x3 normal equations after
+the previous ones are scaled by a forgetting factor. The fit therefore starts
+from the previous frame's solution instead of from scratch, stays defined on
+frames with fewer than 3 midpoints once it has history, and changes smoothly
+from frame to frame. The normal equations of a quadratic only need the power
+sums of y (up to y^4) and of x*y^k, so each update is a handful of reductions
+plus a closed-form 3x3 solve.
+
+    fitter = TrajectoryFitter()
+    coeffs, curve_pts = fitter.fit(midpoints)  # drop-in for fit_trajectory
+    xy = fitter.centerline(50)                # (50, 2) float [x, y], no drawing involved
+
+fit_session() runs a fitter headless over a whole session.
+"""
+
+import numpy as np
+
+from src.planning.track_utils import curve_points
+
+FORGETTING = 0.7  # weight of the accumulated history at each new frame (1 = plain least squares over all frames)
+Y_SCALE = 480.0  # y is divided by this before fitting to keep the normal equations well conditioned
+MIN_POINTS = 3  # midpoints needed to start a fit without history
+RIDGE = 1e-12  # relative diagonal loading, so degenerate frames cannot make the system singular
+
+
+def _solve_sym3(a, b, c, d, e, f, r):
+    """Solve [[a, b, c], [b, d, e], [c, e, f]] @ theta = r by Cramer's rule (cheaper than np.linalg for 3x3)."""
+    r0, r1, r2 = r
+    # Cofactors of the first row, then the determinant
+    k0 = d * f - e * e
+    k1 = b * f - c * e
+    k2 = b * e - c * d
+    det = a * k0 - b * k1 + c * k2
+    t0 = (r0 * k0 - b * (r1 * f - e * r2) + c * (r1 * e - d * r2)) / det
+    t1 = (a * (r1 * f - e * r2) - r0 * k1 + c * (b * r2 - c * r1)) / det
+    t2 = (a * (d * r2 - e * r1) - b * (b * r2 - c * r1) + r0 * k2) / det
+    return t0, t1, t2
+
+
+class TrajectoryFitter:
+    """Recursive least-squares quadratic fit of x = f(y) through per-frame midpoints."""
+
+    def __init__(self, forgetting=FORGETTING, y_scale=Y_SCALE, min_points=MIN_POINTS):
+        if not 0.0 < forgetting <= 1.0:
+            raise ValueError(f"forgetting must be in (0, 1], got {forgetting}")
+        self.forgetting = forgetting
+        self.y_scale = y_scale
+        self.min_points = min_points
+        self.reset()
+
+    def reset(self):
+        """Forget all history (e.g. at the start of a new session)."""
+        self._moments = [0.0] * 5  # weighted sums of y^0 .. y^4 (scaled y)
+        self._rhs = [0.0] * 3  # weighted sums of x*y^2, x*y, x
+        self._theta = None  # coefficients in scaled y
+        self.y_range = None  # (y_min, y_max) of the last non-empty update, in pixels
+
+    @property
+    def coeffs(self):
+        """Current coefficients in pixels, highest power first (as np.polyfit/np.polyval), or None."""
+        if self._theta is None:
+            return None
+        a, b, c = self._theta
+        return np.array([a / self.y_scale ** 2, b / self.y_scale, c])
+
+    def update(self, midpoints):
+        """Add one frame of (N, 2) [x, y] midpoints and return the updated coefficients (or None)."""
+        points = np.asarray(midpoints, dtype=float).reshape(-1, 2)
+        if len(points) == 0:
+            return self.coeffs
+        if self._theta is None and len(points) < self.min_points:
+            return None
+
+        x, y_px = points[:, 0], points[:, 1]
+        y = y_px / self.y_scale
+        y2 = y * y
+        lam = self.forgetting
+        frame_moments = (len(y), y.sum(), y2.sum(), y2 @ y, y2 @ y2)
+        frame_rhs = (x @ y2, x @ y, x.sum())
+        self._moments = [lam * old + float(new) for old, new in zip(self._moments, frame_moments)]
+        self._rhs = [lam * old + float(new) for old, new in zip(self._rhs, frame_rhs)]
+
+        # Normal matrix [[m4, m3, m2], [m3, m2, m1], [m2, m1, m0]] with a little diagonal loading
+        m0, m1, m2, m3, m4 = self._moments
+        ridge = RIDGE * max(m4 + m2 + m0, 1.0)
+        self._theta = _solve_sym3(m4 + ridge, m3, m2, m2 + ridge, m1, m0 + ridge, self._rhs)
+        self.y_range = (float(y_px.min()), float(y_px.max()))
+        return self.coeffs
+
+    def centerline(self, num_points=100, y_values=None):
+        """
+        The fitted centerline as an (N, 2) float array of [x, y], sampled at
+        y_values or at num_points evenly spaced y over the last frame's midpoints.
+        """
+        if self._theta is None:
+            return np.empty((0, 2))
+        y = np.linspace(*self.y_range, num_points) if y_values is None else np.asarray(y_values, dtype=float)
+        return np.column_stack([np.polyval(self.coeffs, y), y])
+
+    def fit(self, midpoints, num_points=100):
+        """Update with one frame and return (coeffs, curve_pts) like fit_trajectory, or (None, None)."""
+        coeffs = self.update(midpoints)
+        if coeffs is None:
+            return None, None
+        return coeffs, curve_points(coeffs, *self.y_range, num_points)
+
+
+def fit_session(midpoints_per_frame, forgetting=FORGETTING, y_scale=Y_SCALE):
+    """Fit a whole session headless; returns an (F, 3) coefficient array with NaN rows for unfitted frames."""
+    fitter = TrajectoryFitter(forgetting, y_scale)
+    coeffs = np.full((len(midpoints_per_frame), 3), np.nan)
+    for i, midpoints in enumerate(midpoints_per_frame):
+        result = fitter.update(midpoints)
+        if result is not None:
+            coeffs[i] = result
+    return coeffs
@@ -0,0 +1,40 @@
+# Run from the repository root: python -m pytest tests
+import numpy as np
+
+from src.planning.cone_store import ConeStore, ConeStoreWriter
+from src.planning.track_utils import boxes_to_cones
+
+
+def random_boxes(rng, n, h=480, w=640):
+    """[x1, y1, x2, y2, conf, cls] rows, some with integral or frame-clipped corners."""
+    x1 = rng.uniform(0, w - 2, n)
+    y1 = rng.uniform(0, h - 2, n)
+    x2 = np.minimum(x1 + rng.uniform(1, 60, n), w)
+    y2 = np.minimum(y1 + rng.uniform(1, 60, n), h)
+    clipped = rng.random(n) < 0.3
+    y2[clipped] = h
+    whole = rng.random(n) < 0.2
+    x1[whole], x2[whole] = np.floor(x1[whole]), np.floor(x2[whole])
+    cls = rng.choice([0, 4], n)
+    return np.stack([x1, y1, x2, y2, rng.uniform(0.25, 1, n), cls], axis=1).astype(np.float32)
+
+
+def test_cones_match_boxes_to_cones(tmp_path):
+    rng = np.random.default_rng(0)
+    frames = [random_boxes(rng, rng.integers(0, 15)) for _ in range(300)]
+    with ConeStoreWriter(str(tmp_path), (480, 640)) as writer:
+        for i, boxes in enumerate(frames):
+            writer.append(f"frame_{i:05d}.jpg", boxes)
+
+    store = ConeStore(str(tmp_path))
+    assert len(store) == len(frames)
+    for i, boxes in enumerate(frames):
+        np.testing.assert_array_equal(store.cones(i), boxes_to_cones(boxes))
+    np.testing.assert_array_equal(store.cones_range(0, len(store)),
+                                  np.concatenate([boxes_to_cones(b) for b in frames]))
+
+
+def test_empty_frames(tmp_path):
+    with ConeStoreWriter(str(tmp_path), (480, 640)) as writer:
+        writer.append("frame_00000.jpg", np.empty((0, 6)))
+    assert ConeStore(str(tmp_path)).cones(0).shape == (0, 3)
@@ -0,0 +1,52 @@
+# Run from the repository root: python -m pytest tests
+import numpy as np
+import pytest
+
+from src.planning.track_utils import match_cones, pair_cones
+
+
+def greedy_reference(left_y, right_y, threshold):
+    """Brute-force greedy over every left/right pair in (difference, left, right) order."""
+    candidates = sorted((abs(ly - ry), l, r) for l, ly in enumerate(left_y) for r, ry in enumerate(right_y)
+                        if abs(ly - ry) < threshold)
+    match = np.full(len(left_y), -1)
+    used = set()
+    for _, l, r in candidates:
+        if match[l] < 0 and r not in used:
+            match[l] = r
+            used.add(r)
+    return match
+
+
+@pytest.mark.parametrize("left_y, right_y, threshold", [
+    ((0, 30), (40, 20), 30),  # equal differences: lowest left index wins, leaving a second pair
+    ((10, 10), (10,), 30),  # equal coordinates on one side
+    ((10, 10, 20), (10, 20, 20), 5),
+    ((0, 10, 20), (10, 10, 0), 11),
+    ((5,), (0, 10), 30),  # equal differences: lowest right index wins
+    ((), (1, 2), 30),
+    ((1, 2), (), 30),
+    ((0,), (30,), 30),  # threshold is exclusive
+])
+def test_match_cones_ties(left_y, right_y, threshold):
+    np.testing.assert_array_equal(match_cones(left_y, right_y, threshold),
+                                  greedy_reference(left_y, right_y, threshold))
+
+
+@pytest.mark.parametrize("integer", [True, False])
+def test_match_cones_random(integer):
+    rng = np.random.default_rng(0)
+    for _ in range(3000):
+        num_left, num_right = rng.integers(0, 12, 2)
+        spread = rng.choice([5, 40, 400])
+        left_y = rng.integers(0, spread, num_left) if integer else rng.uniform(0, spread, num_left)
+        right_y = rng.integers(0, spread, num_right) if integer else rng.uniform(0, spread, num_right)
+        threshold = rng.choice([1, 15, 30])
+        np.testing.assert_array_equal(match_cones(left_y, right_y, threshold),
+                                      greedy_reference(left_y.tolist(), right_y.tolist(), threshold))
+
+
+def test_pair_cones_midpoints():
+    left = [(100, 0), (100, 30)]
+    right = [(300, 40), (300, 20)]
+    np.testing.assert_array_equal(pair_cones(left, right, 30), [[200, 10], [200, 35]])